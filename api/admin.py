@@ -1,24 +1,111 @@
 from django.contrib import admin
-from .models import Conversation, ChatMessage
+from django.contrib.postgres.search import SearchQuery
+from django.db import connections
+from .admin_tools import InputFilter, KeysetAdminMixin
+from .deletion import soft_delete
+from .models import Conversation, ChatMessage, RequestProfile
+from .search import SEARCH_CONFIG
+
+
+class UsernameFilter(InputFilter):
+    title = 'username'
+    parameter_name = 'username'
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(user__username=self.value())
+
+
+class ConversationIdFilter(InputFilter):
+    title = 'conversation id'
+    parameter_name = 'conversation'
+
+    def queryset(self, request, queryset):
+        if not self.value():
+            return None
+        try:
+            conversation_id = int(self.value())
+        except ValueError:
+            return queryset.none()
+        created_at = (
+            Conversation.all_objects.filter(id=conversation_id).values_list('created_at', flat=True).first()
+        )
+        if created_at is None:
+            return queryset.none()
+        return queryset.in_conversation(conversation_id, created_at)
 
 
 @admin.register(Conversation)
-class ConversationAdmin(admin.ModelAdmin):
+class ConversationAdmin(KeysetAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'title', 'user', 'created_at', 'updated_at']
-    list_filter = ['created_at', 'user']
-    search_fields = ['title', 'user__username']
+    list_filter = ['created_at', 'is_archived', UsernameFilter]
+    list_select_related = ['user']
+    # title__icontains is served by the trigram index; usernames match exactly
+    search_fields = ['title']
+    search_help_text = 'Title contains, or exact username'
+    autocomplete_fields = ['user']
     readonly_fields = ['created_at', 'updated_at']
-    ordering = ['-updated_at']
+
+    def get_search_results(self, request, queryset, search_term):
+        results, may_have_duplicates = super().get_search_results(request, queryset, search_term)
+        if search_term:
+            results |= queryset.filter(user__username=search_term.strip())
+        return results, may_have_duplicates
+
+    # Deleting through the admin must not run the cascade collector either
+    def delete_model(self, request, obj):
+        soft_delete(Conversation.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        soft_delete(queryset)
+
+    def get_deleted_objects(self, objs, request):
+        # The default confirmation page walks every related message
+        perms_needed = set() if self.has_delete_permission(request) else {self.opts.verbose_name}
+        return [str(obj) for obj in objs], {self.opts.verbose_name_plural: len(objs)}, perms_needed, []
 
 
 @admin.register(ChatMessage)
-class ChatMessageAdmin(admin.ModelAdmin):
+class ChatMessageAdmin(KeysetAdminMixin, admin.ModelAdmin):
     list_display = ['id', 'conversation', 'role', 'short_content', 'has_news_context', 'created_at']
-    list_filter = ['role', 'has_news_context', 'created_at']
-    search_fields = ['content', 'conversation__title']
+    # Date ranges prune month partitions; any other filter is a cheap column
+    list_filter = ['role', 'has_news_context', 'created_at', ConversationIdFilter]
+    list_select_related = ['conversation__user']
+    search_fields = ['content']
+    search_help_text = 'Full-text search in message content'
+    autocomplete_fields = ['conversation']
     readonly_fields = ['created_at']
-    ordering = ['-created_at']
-    
+    # Sorting the whole table by another column would be a full sort
+    sortable_by = ['id']
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term or connections[queryset.db].vendor != 'postgresql':
+            return super().get_search_results(request, queryset, search_term)
+        # The trigger-maintained search_vector has a GIN index, content does not
+        query = SearchQuery(search_term, search_type='websearch', config=SEARCH_CONFIG)
+        return queryset.filter(search_vector=query), False
+
     def short_content(self, obj):
         return obj.content[:50] + "..." if len(obj.content) > 50 else obj.content
-    short_content.short_description = 'Content'
\ No newline at end of file
+    short_content.short_description = 'Content'
+
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ['created_at', 'method', 'path', 'status_code', 'duration_ms', 'query_count', 'query_ms',
+                    'upstream_ms', 'reason', 'user']
+    list_filter = ['reason', 'method', 'created_at']
+    search_fields = ['path', 'request_id']
+    list_select_related = ['user']
+    ordering = ['-created_at']
+
+    def upstream_ms(self, obj):
+        return round(sum(entry["ms"] for entry in obj.upstream.values()), 1)
+    upstream_ms.short_description = 'Upstream ms'
+
+    # Written by ProfilerMiddleware only
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,78 @@
+"""
+Offline stand-ins for the OpenAI client and NewsAPI.
+
+``fake_assistant()`` builds a real AIAssistant (router, intent detection and
+prompt assembly included) on top of them, so code paths that chat can run
+without network access or API keys, e.g. in ``api.tests.test_budgets``.
+"""
+import json
+from types import SimpleNamespace
+
+
+class FakeNewsFetcher:
+    """NewsFetcher with canned articles"""
+
+    def __init__(self, articles=3):
+        self.articles = articles
+        self.calls = 0
+
+    def warmup(self):
+        pass
+
+    def get_top_headlines(self, query=None, category=None, country='us', limit=5):
+        return self._articles(query or category or "news", limit)
+
+    def search_news(self, query, days_back=7, limit=5):
+        return self._articles(query, limit)
+
+    def _articles(self, topic, limit):
+        self.calls += 1
+        return [
+            {
+                'title': f"{topic.title()} story {i}",
+                'description': f"What happened in {topic} today, part {i}.",
+                'source': "Fake Wire",
+                'published': "2025-01-01T00:00:00Z",
+                'url': f"https://example.com/{i}",
+            }
+            for i in range(1, min(limit, self.articles) + 1)
+        ]
+
+
+class _FakeCompletions:
+    def __init__(self, reply):
+        self.reply = reply
+
+    def create(self, model, messages, **kwargs):
+        prompt = messages[-1]["content"]
+        if "Extract search parameters" in prompt:
+            content = json.dumps({"query": "technology", "category": "technology", "limit": 5})
+        else:
+            content = self.reply
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        completion_tokens = len(content) // 4
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(role="assistant", content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+class FakeOpenAIClient:
+    """The slice of the OpenAI client AIAssistant uses: chat.completions.create"""
+
+    def __init__(self, reply="Here is a short answer. Would you like the latest news on this?"):
+        self.chat = SimpleNamespace(completions=_FakeCompletions(reply))
+
+    def with_options(self, **kwargs):
+        return self
+
+
+def fake_assistant():
+    from .model import AIAssistant
+
+    return AIAssistant(client=FakeOpenAIClient(), news_fetcher=FakeNewsFetcher())
@@ -0,0 +1,59 @@
+import re
+from typing import NamedTuple
+
+NEWS = "news"
+CONFIRM = "confirm"
+OTHER = "other"
+
+# Terms are matched on word boundaries, so "new" no longer fires on "renew"
+# and "get" no longer fires on "forget".
+NEWS_TERMS = [
+    r"news", r"latest", r"current", r"today", r"recent", r"happening",
+    r"what[’']?s\s+new", r"updates?", r"events?", r"headlines?", r"stor(?:y|ies)",
+]
+CONFIRM_TERMS = [
+    r"yes", r"yeah", r"yep", r"sure", r"please", r"go\s+ahead", r"do\s+it",
+    r"ok", r"okay", r"proceed", r"fetch", r"pull", r"get", r"show", r"new",
+]
+OFFER_TERMS = [
+    r"headlines?", r"news", r"fetch", r"pull", r"stor(?:y|ies)",
+]
+
+# One alternation per message: the named group that matched tells us which
+# intent the term belongs to, so every message is scanned exactly once.
+_MESSAGE_RE = re.compile(
+    r"\b(?:(?P<news>{})|(?P<confirm>{}))\b".format("|".join(NEWS_TERMS), "|".join(CONFIRM_TERMS)),
+    re.IGNORECASE,
+)
+_OFFER_RE = re.compile(r"\b(?:{})\b".format("|".join(OFFER_TERMS)), re.IGNORECASE)
+
+
+class Intent(NamedTuple):
+    label: str
+    score: float
+
+
+def classify(message):
+    """Classify a user message as a news request, a confirmation or neither.
+
+    The score grows with the number of matching terms for the winning label
+    and is always in the ``[0, 1)`` range.
+    """
+    news_hits = 0
+    confirm_hits = 0
+    for match in _MESSAGE_RE.finditer(message):
+        if match.lastgroup == NEWS:
+            news_hits += 1
+        else:
+            confirm_hits += 1
+
+    if news_hits:
+        return Intent(NEWS, 1 - 0.5 ** news_hits)
+    if confirm_hits:
+        return Intent(CONFIRM, 1 - 0.5 ** confirm_hits)
+    return Intent(OTHER, 0.0)
+
+
+def offers_news(assistant_message):
+    """Check whether an assistant reply offers to fetch news for the user"""
+    return bool(assistant_message) and _OFFER_RE.search(assistant_message) is not None
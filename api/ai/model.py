@@ -1,17 +1,31 @@
-from openai import OpenAI
+import logging
 import os
-from dotenv import load_dotenv
+import time
 from .news_fetcher import NewsFetcher
+from .router import ModelRouter
+from .intent import CONFIRM, NEWS, classify, offers_news
+from .prompt import build_messages, prompt_cache_stats
 import json
 
-load_dotenv()
+from shared.log import elapsed_ms
+
+logger = logging.getLogger(__name__)
 
 class AIAssistant:
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-        self.news_fetcher = NewsFetcher()
+    """
+    Stateless chat assistant: all per-conversation state is passed in, so a
+    single instance can be shared by every thread of a worker process.
+    """
+
+    def __init__(self, client=None, news_fetcher=None, router=None):
+        if client is None:
+            from openai import OpenAI
+
+            client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = client
+        self.router = router or ModelRouter(self.client)
+        self.news_fetcher = news_fetcher or NewsFetcher()
         self.model = "gpt-4o-mini"  # Use a stable model
-        self.pending_news_request = None  # Track if we need to fetch news
         
     def _build_context_from_news(self, articles):
         """Build context string from news articles"""
@@ -30,33 +44,28 @@ class AIAssistant:
         context += "INSTRUCTION: Present these news items to the user in a clear, readable format. Do NOT ask for confirmation - the data is already fetched.\n\n"
         return context
     
-    def _detect_news_query(self, message, conversation_history):
+    def _detect_news_query(self, message, conversation_history, last_assistant_offers_news=None):
         """Detect if we should fetch news"""
-        news_keywords = ['news', 'latest', 'current', 'today', 'recent', 'happening', 
-                        'what\'s new', 'update', 'events', 'headlines', 'stories']
-        message_lower = message.lower()
-        
+        intent = classify(message)
+
         # Direct news request
-        if any(keyword in message_lower for keyword in news_keywords):
+        if intent.label == NEWS:
             return True
-    
+
         # Check if this is a confirmation/follow-up to a news request
-        if conversation_history:
-            confirmation_keywords = ['yes', 'yeah', 'sure', 'please', 'go ahead', 'do it', 
-                                    'ok', 'okay', 'proceed', 'fetch', 'pull', 'get', 'show', 'new']
-            last_assistant_msg = None
-            for msg in reversed(conversation_history):
-                if msg['role'] == 'assistant':
-                    last_assistant_msg = msg['content'].lower()
-                    break
-            
+        if intent.label == CONFIRM and conversation_history:
+            if last_assistant_offers_news is None:
+                last_assistant_offers_news = False
+                for msg in reversed(conversation_history):
+                    if msg['role'] == 'assistant':
+                        last_assistant_offers_news = offers_news(msg['content'])
+                        break
+
             # If assistant was asking about news and user confirms
-            if last_assistant_msg and any(kw in message_lower for kw in confirmation_keywords):
-                if any(word in last_assistant_msg for word in ['headline', 'news', 'fetch', 'pull', 'stories']):
-                    return True
-        
+            return last_assistant_offers_news
+
         return False
-    
+
     def _extract_search_params(self, message, conversation_history):
         """Extract search parameters from conversation context"""
         # Combine recent messages for context
@@ -67,9 +76,9 @@ class AIAssistant:
         full_context = "\n".join(context_messages)
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[{
+            response, _ = self.router.create(
+                self.model,
+                [{
                     "role": "system",
                     "content": """Extract news search parameters from the conversation. Output ONLY valid JSON.
 
@@ -94,12 +103,29 @@ class AIAssistant:
             params = json.loads(result)
             return params
         except Exception as e:
-            print(f"Error extracting params: {e}")
+            logger.warning("Search parameter extraction failed: %s", e)
             # Fallback: extract keywords from message
             return {"query": message, "category": "technology", "limit": 5}
     
-    def chat(self, message, conversation_history=None, model='gpt-4o-mini'):
-        """Main chat function with news awareness"""
+    def _usage(self, response):
+        """Token counts reported by the API, or zeros when missing"""
+        usage = getattr(response, "usage", None)
+        details = getattr(usage, "prompt_tokens_details", None)
+        return {
+            "prompt_tokens": getattr(usage, "prompt_tokens", 0) or 0,
+            "completion_tokens": getattr(usage, "completion_tokens", 0) or 0,
+            "total_tokens": getattr(usage, "total_tokens", 0) or 0,
+            # Prompt tokens served from the provider's prefix cache
+            "cached_tokens": getattr(details, "cached_tokens", 0) or 0,
+        }
+
+    def chat(self, message, conversation_history=None, model=None, last_assistant_offers_news=None):
+        """Main chat function with news awareness.
+
+        ``model`` must be on the router allow-list; when omitted the router
+        picks one. ``last_assistant_offers_news`` is the cached classification
+        of the last assistant turn; when omitted it is computed from the history.
+        """
         if conversation_history is None:
             conversation_history = []
         
@@ -107,10 +133,10 @@ class AIAssistant:
         has_news = False
         
         # Check if we should fetch news
-        if self._detect_news_query(message, conversation_history):
+        if self._detect_news_query(message, conversation_history, last_assistant_offers_news):
             # Extract search parameters from full conversation
             params = self._extract_search_params(message, conversation_history)
-            print(f"Fetching news with params: {params}")  # Debug log
+            logger.debug("Fetching news", extra={"params": params})
             
             # Try headlines first, then search
             articles = self.news_fetcher.get_top_headlines(
@@ -131,41 +157,31 @@ class AIAssistant:
             context = self._build_context_from_news(articles)
             has_news = bool(articles)
         
-        # Build messages for API
-        messages = [
-            {
-                "role": "system",
-                "content": """You are a helpful AI assistant with access to real-time news data.
-
-            IMPORTANT RULES:
-            1. When you receive news context (marked with "--- CURRENT NEWS CONTEXT ---"), these are REAL articles that have been fetched. Present them immediately to the user.
-            2. Do NOT ask for confirmation before showing news - just show it.
-            3. Format news clearly with titles, sources, dates, and brief summaries.
-            4. Always cite the source for each news item.
-            5. If the user asks follow-up questions about the news, answer based on the provided context.
-            6. If no news context is provided, you can discuss general topics or ask clarifying questions."""
-                        }
-                    ]
-        
-        # Add conversation history
-        messages.extend(conversation_history)
-        
-        # Add current user message with context
-        user_message = context + message if context else message
-        messages.append({"role": "user", "content": user_message})
+        # Stable prefix first, news last; see api.ai.prompt
+        messages = build_messages(conversation_history, message, context)
         
         # Get response
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=0.7
-        )
+        model = self.router.choose(model, message, simple=not context)
+        started = time.perf_counter()
+        response, model = self.router.create(model, messages, temperature=0.7)
         
         assistant_message = response.choices[0].message.content
+        usage = self._usage(response)
+        duration_ms = elapsed_ms(started)
+        prompt_cache_stats.record(usage, duration_ms)
+        logger.info("Chat completion", extra={
+            "model": model,
+            "has_news_context": has_news,
+            "duration_ms": duration_ms,
+            **usage,
+        })
         
         return {
             "response": assistant_message,
             "has_news_context": has_news,
+            "offers_news": offers_news(assistant_message),
+            "model": model,
+            "usage": usage,
             "conversation_history": conversation_history + [
                 {"role": "user", "content": message},
                 {"role": "assistant", "content": assistant_message}
@@ -1,11 +1,30 @@
+import logging
+import time
+
 import requests
 from datetime import datetime, timedelta
 import os
 
+from shared.log import elapsed_ms
+
+from ..profiling import upstream
+
+logger = logging.getLogger(__name__)
+
 class NewsFetcher:
-    def __init__(self):
+    def __init__(self, session=None, timeout=(5, 30)):
         self.news_api_key = os.getenv("NEWS_API_KEY")  # Get free key from newsapi.org
         self.base_url = "https://newsapi.org/v2"
+        # A shared session keeps connections to NewsAPI alive between requests
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+    def warmup(self):
+        """Open a connection to NewsAPI ahead of the first real request"""
+        try:
+            self.session.head(self.base_url, timeout=self.timeout)
+        except Exception as e:
+            logger.warning("NewsAPI warmup failed: %s", e)
     
     def get_top_headlines(self, query=None, category=None, country='us', limit=5):
         """Fetch top headlines from News API"""
@@ -21,14 +40,7 @@ class NewsFetcher:
         if category:
             params['category'] = category
             
-        try:
-            response = requests.get(endpoint, params=params)
-            response.raise_for_status()
-            articles = response.json().get('articles', [])
-            return self._format_articles(articles)
-        except Exception as e:
-            print(f"Error fetching news: {e}")
-            return []
+        return self._fetch(endpoint, params)
     
     def search_news(self, query, days_back=7, limit=5):
         """Search for news articles"""
@@ -44,14 +56,25 @@ class NewsFetcher:
             'language': 'en'
         }
         
+        return self._fetch(endpoint, params)
+
+    def _fetch(self, endpoint, params):
+        started = time.perf_counter()
         try:
-            response = requests.get(endpoint, params=params)
-            response.raise_for_status()
-            articles = response.json().get('articles', [])
-            return self._format_articles(articles)
+            with upstream("newsapi"):
+                response = self.session.get(endpoint, params=params, timeout=self.timeout)
+                response.raise_for_status()
+                articles = response.json().get('articles', [])
         except Exception as e:
-            print(f"Error searching news: {e}")
+            logger.warning("NewsAPI request failed: %s", e, extra={"endpoint": endpoint, "duration_ms": elapsed_ms(started)})
             return []
+        logger.debug("NewsAPI request", extra={
+            "endpoint": endpoint,
+            "query": params.get('q'),
+            "articles": len(articles),
+            "duration_ms": elapsed_ms(started),
+        })
+        return self._format_articles(articles)
     
     def _format_articles(self, articles):
         """Format articles for context"""
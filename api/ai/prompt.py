@@ -0,0 +1,77 @@
+"""
+Prompt layout for chat turns, ordered for upstream prompt-prefix caching.
+
+Providers cache the longest previously seen prefix of a prompt, so every
+turn is assembled as: the frozen system prompt, the history exactly as it
+was sent before, the new user message, and only then anything volatile
+(news context). Turn N+1 therefore starts with the full prompt of turn N
+minus its news block.
+"""
+import threading
+
+SYSTEM_PROMPT = """You are a helpful AI assistant with access to real-time news data.
+
+IMPORTANT RULES:
+1. When you receive news context (marked with "--- CURRENT NEWS CONTEXT ---"), these are REAL articles that have been fetched. Present them immediately to the user.
+2. Do NOT ask for confirmation before showing news - just show it.
+3. Format news clearly with titles, sources, dates, and brief summaries.
+4. Always cite the source for each news item.
+5. If the user asks follow-up questions about the news, answer based on the provided context.
+6. If no news context is provided, you can discuss general topics or ask clarifying questions."""
+
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
+def build_messages(history, message, news_context=None):
+    """
+    Messages for one chat completion.
+
+    ``history`` must not contain ``message`` itself. News context goes in a
+    trailing system message so the user message stays byte-identical to
+    the copy stored in history for the next turn.
+    """
+    messages = [_SYSTEM_MESSAGE, *history, {"role": "user", "content": message}]
+    if news_context:
+        messages.append({"role": "system", "content": news_context})
+    return messages
+
+
+class PromptCacheStats:
+    """Per-process prompt cache counters, reported at GET /api/metrics/"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.hit_ms = 0.0
+        self.miss_ms = 0.0
+
+    def record(self, usage, duration_ms):
+        cached = usage.get("cached_tokens", 0)
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage.get("prompt_tokens", 0)
+            self.cached_tokens += cached
+            if cached:
+                self.hits += 1
+                self.hit_ms += duration_ms
+            else:
+                self.miss_ms += duration_ms
+
+    def snapshot(self):
+        with self._lock:
+            misses = self.requests - self.hits
+            return {
+                "requests": self.requests,
+                "requests_with_cache_hit": self.hits,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "token_hit_rate": round(self.cached_tokens / self.prompt_tokens, 3) if self.prompt_tokens else None,
+                "avg_ms_with_hit": round(self.hit_ms / self.hits, 1) if self.hits else None,
+                "avg_ms_without_hit": round(self.miss_ms / misses, 1) if misses else None,
+            }
+
+
+prompt_cache_stats = PromptCacheStats()
@@ -0,0 +1,179 @@
+import contextvars
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, CancelledError, ThreadPoolExecutor, wait
+
+import shared.config as config
+
+from ..profiling import upstream
+
+logger = logging.getLogger(__name__)
+
+
+class ModelNotAllowed(ValueError):
+    pass
+
+
+class ModelStats:
+    """Rolling latency and error stats for a single model"""
+
+    def __init__(self, window):
+        self._latencies = deque(maxlen=window)
+        self._errors = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency, error=False):
+        with self._lock:
+            if not error:
+                self._latencies.append(latency)
+            self._errors.append(error)
+
+    def p95(self):
+        with self._lock:
+            if len(self._latencies) < config.ROUTER_MIN_SAMPLES:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[int(len(ordered) * 0.95) - 1]
+
+    def snapshot(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            calls = len(self._errors)
+            errors = sum(self._errors)
+        return {
+            "calls": calls,
+            "error_rate": errors / calls if calls else 0.0,
+            "p50": latencies[len(latencies) // 2] if latencies else None,
+            "p95": latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= config.ROUTER_MIN_SAMPLES else None,
+        }
+
+
+class ModelRouter:
+    """
+    Routes chat completions between the allowed models.
+
+    Calls run on a shared pool of ROUTER_MAX_WORKERS threads, all within the
+    model's deadline. When a call is still running after the model's p95
+    latency, a hedged request is sent to the fallback model and whichever
+    succeeds first wins; the loser is cancelled if it has not started. A
+    failed call that was not hedged is retried once on the fallback.
+    """
+
+    def __init__(self, client, models=None, default_model=None, max_workers=None):
+        self.client = client
+        self.models = models or config.CHAT_MODELS
+        self.default_model = default_model or config.DEFAULT_CHAT_MODEL
+        self.stats = {name: ModelStats(config.ROUTER_STATS_WINDOW) for name in self.models}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or config.ROUTER_MAX_WORKERS, thread_name_prefix="model-router"
+        )
+
+    def resolve(self, model):
+        """Validate a client supplied model against the allow-list"""
+        if not model:
+            return self.default_model
+        if model not in self.models:
+            raise ModelNotAllowed(f"Model '{model}' is not allowed")
+        return model
+
+    def cheapest(self):
+        return min(self.models, key=lambda name: self.models[name]["cost"])
+
+    def choose(self, model, prompt, simple=False):
+        """
+        Apply the routing policy: when the client did not ask for a specific
+        model, short and simple prompts go to the cheapest model.
+        """
+        if not model and simple and len(prompt) <= config.SIMPLE_PROMPT_MAX_CHARS:
+            return self.cheapest()
+        return self.resolve(model)
+
+    def create(self, model, messages, **kwargs):
+        """
+        Run a chat completion with deadline, hedging and fallback.
+
+        Returns ``(response, model_used)``.
+        """
+        model = self.resolve(model)
+        fallback = self.models[model].get("fallback")
+        if fallback not in self.models:
+            fallback = None
+        deadline = time.monotonic() + self.models[model]["deadline"]
+        hedge_after = self.stats[model].p95() if fallback else None
+
+        # Set by the first successful call and when create() returns: calls still
+        # queued then skip the upstream instead of paying for an unused answer
+        settled = threading.Event()
+        pending = {self._submit(model, messages, kwargs, deadline, settled): model}
+        last_error = None
+        try:
+            if hedge_after is not None:
+                done, _ = wait(list(pending), timeout=hedge_after)
+                if not done:
+                    pending[self._submit(fallback, messages, kwargs, deadline, settled)] = fallback
+                    fallback = None
+
+            while pending:
+                remaining = deadline - time.monotonic()
+                done, _ = wait(list(pending), timeout=max(remaining, 0), return_when=FIRST_COMPLETED)
+                if not done:
+                    break
+                for future in done:
+                    used = pending.pop(future)
+                    try:
+                        return future.result(), used
+                    except Exception as e:
+                        last_error = e
+                # Nothing left in flight: retry once on the fallback
+                if not pending and fallback and time.monotonic() < deadline:
+                    pending[self._submit(fallback, messages, kwargs, deadline, settled)] = fallback
+                    fallback = None
+        finally:
+            settled.set()
+            # Calls not started yet give their worker back; running ones end at the deadline
+            for future in pending:
+                future.cancel()
+
+        if last_error is not None:
+            raise last_error
+        raise TimeoutError(f"Model '{model}' did not answer within its deadline")
+
+    def report(self):
+        return {name: stats.snapshot() for name, stats in self.stats.items()}
+
+    def _submit(self, model, messages, kwargs, deadline, settled):
+        # Copy the context so logs from the pool thread keep the request id
+        return self._executor.submit(
+            contextvars.copy_context().run, self._call, model, messages, kwargs, deadline, settled, time.monotonic()
+        )
+
+    def _call(self, model, messages, kwargs, deadline, settled, queued_at):
+        if settled.is_set():
+            raise CancelledError(f"Model '{model}' call no longer needed")
+        started = time.monotonic()
+        # Waiting for a pool worker is logged, not counted as model latency
+        extra = {"model": model, "queue_ms": round((started - queued_at) * 1000, 1)}
+        timeout = min(self.models[model]["deadline"], deadline - started)
+        if timeout <= 0:
+            logger.warning("Model call skipped: deadline passed", extra=extra)
+            raise TimeoutError(f"Model '{model}' call started after the deadline")
+        try:
+            with upstream("openai"):
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    timeout=timeout,
+                    **kwargs
+                )
+        except Exception as e:
+            elapsed = time.monotonic() - started
+            self.stats[model].record(elapsed, error=True)
+            logger.warning("Model call failed: %s", e, extra={**extra, "duration_ms": round(elapsed * 1000, 1)})
+            raise
+        settled.set()
+        elapsed = time.monotonic() - started
+        self.stats[model].record(elapsed)
+        logger.debug("Model call", extra={**extra, "duration_ms": round(elapsed * 1000, 1)})
+        return response
@@ -0,0 +1,166 @@
+"""
+Cold storage for idle conversations.
+
+``archive_conversation`` moves a conversation's messages out of the hot
+``api_chatmessage`` table into one compressed ConversationArchive row;
+``rehydrate`` puts them back, with their original ids and timestamps, the
+next time the conversation is opened.
+
+Archived messages are no longer in the hot table, so full-text search
+(api.search) does not find them until the conversation is rehydrated.
+Rehydration writes, and it runs on the read path (GET of a conversation, a
+chat turn): the writes go to the primary, and the reader is pinned to it
+afterwards (see api.replicas).
+"""
+import json
+import logging
+import time
+import zlib
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+
+from .models import ChatMessage, Conversation, ConversationArchive
+
+from shared.log import elapsed_ms
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+ROLES = ('user', 'assistant')
+MESSAGE_COLUMNS = ('id', 'role', 'content', 'has_news_context', 'offers_news', 'created_at')
+
+
+def _compress(raw):
+    if settings.ARCHIVE_CODEC == 'zstd' and zstandard is not None:
+        return 'zstd', zstandard.ZstdCompressor(level=10).compress(raw)
+    return 'zlib', zlib.compress(raw, 9)
+
+
+def _decompress(codec, data):
+    if codec == 'zstd':
+        return zstandard.ZstdDecompressor().decompress(data)
+    return zlib.decompress(data)
+
+
+def _encode(rows):
+    # Compact row arrays: [id, role index, content, has_news, offers_news, created_at in microseconds]
+    return json.dumps(
+        [
+            [message_id, ROLES.index(role), content, int(has_news), int(offers_news),
+             (created_at - EPOCH) // timedelta(microseconds=1)]
+            for message_id, role, content, has_news, offers_news, created_at in rows
+        ],
+        separators=(',', ':'),
+        ensure_ascii=False,
+    ).encode('utf-8')
+
+
+def _decode(raw):
+    return [
+        (message_id, ROLES[role], content, bool(has_news), bool(offers_news),
+         EPOCH + timedelta(microseconds=created_us))
+        for message_id, role, content, has_news, offers_news, created_us in json.loads(raw)
+    ]
+
+
+def archive_conversation(conversation_id, cutoff):
+    """
+    Archive one conversation if it is still idle since ``cutoff``.
+
+    Returns ``(raw_bytes, compressed_bytes)``, the encoded message JSON and
+    its compressed size, or None when skipped. These are not table space
+    freed: deleted rows only become reusable after VACUUM.
+    """
+    with transaction.atomic():
+        conversation = (
+            Conversation.objects.select_for_update(skip_locked=True)
+            .filter(id=conversation_id, is_archived=False, updated_at__lt=cutoff)
+            .first()
+        )
+        if conversation is None:
+            return None
+
+        rows = list(
+            ChatMessage.objects.filter(conversation_id=conversation_id)
+            .order_by('created_at', 'id')
+            .values_list(*MESSAGE_COLUMNS)
+        )
+        if not rows:
+            return None
+
+        raw = _encode(rows)
+        codec, data = _compress(raw)
+        last_role, last_content = rows[-1][1], rows[-1][2][:100]
+        ConversationArchive.objects.create(
+            conversation_id=conversation_id,
+            codec=codec,
+            data=data,
+            message_count=len(rows),
+            last_role=last_role,
+            last_content=last_content,
+            raw_bytes=len(raw),
+        )
+        # Delete exactly the rows that were archived, never a message that
+        # arrived while this transaction was running.
+        ChatMessage.objects.filter(conversation_id=conversation_id, id__in=[row[0] for row in rows]).delete()
+        # update() leaves updated_at (and so conversation ETags) untouched
+        Conversation.objects.filter(id=conversation_id).update(is_archived=True)
+    return len(raw), len(data)
+
+
+def rehydrate(conversation_id):
+    """Move archived messages back into the hot table. Returns the number restored."""
+    started = time.perf_counter()
+    with transaction.atomic():
+        archive = (
+            ConversationArchive.objects.select_for_update()
+            .filter(conversation_id=conversation_id)
+            .first()
+        )
+        if archive is None:
+            Conversation.objects.filter(id=conversation_id).update(is_archived=False)
+            return 0
+
+        rows = _decode(_decompress(archive.codec, bytes(archive.data)))
+        # Raw insert keeps the original ids and created_at, which
+        # bulk_create would overwrite through auto_now_add.
+        table = connection.ops.quote_name(ChatMessage._meta.db_table)
+        columns = ', '.join(connection.ops.quote_name(column) for column in ('conversation_id',) + MESSAGE_COLUMNS)
+        placeholders = ', '.join(['%s'] * (len(MESSAGE_COLUMNS) + 1))
+        with connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                [(conversation_id,) + row for row in rows],
+            )
+        archive.delete()
+        Conversation.objects.filter(id=conversation_id).update(is_archived=False)
+
+    logger.info("Rehydrated conversation", extra={
+        "conversation_id": conversation_id,
+        "messages": len(rows),
+        "duration_ms": elapsed_ms(started),
+    })
+    return len(rows)
+
+
+def archived_messages(conversation_id):
+    """Rows (in MESSAGE_COLUMNS order) of an archived conversation, without rehydrating it"""
+    archive = ConversationArchive.objects.filter(conversation_id=conversation_id).values('codec', 'data').first()
+    if archive is None:
+        return []
+    return _decode(_decompress(archive['codec'], bytes(archive['data'])))
+
+
+def ensure_hot(conversation):
+    """Rehydrate ``conversation`` (an instance or values() dict) if it is archived"""
+    is_archived = conversation['is_archived'] if isinstance(conversation, dict) else conversation.is_archived
+    if is_archived:
+        conversation_id = conversation['id'] if isinstance(conversation, dict) else conversation.id
+        rehydrate(conversation_id)
@@ -0,0 +1,145 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .replicas import pin_if_recent_write
+
+# Claims copied into every token at issue time. CachedTokenRefreshSerializer
+# re-reads them from the database on every refresh.
+USER_CLAIMS = ("username", "email", "is_staff")
+
+
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+def tokens_for(user):
+    """Issue a refresh token (and its access token) carrying the user claims"""
+    return add_user_claims(RefreshToken.for_user(user), user)
+
+
+def _active_key(user_id):
+    return f"auth-user-active:{user_id}"
+
+
+def user_is_active(user_id):
+    """
+    Whether the user still exists and is active, cached for
+    AUTH_USER_CACHE_TTL seconds. Saving or deleting a User clears the entry
+    (see api.signals); with a per-process cache other workers notice after
+    the TTL. Queryset ``update()`` sends no signal and is also bounded by it.
+    """
+    key = _active_key(user_id)
+    active = cache.get(key) if settings.AUTH_USER_CACHE_TTL else None
+    if active is None:
+        active = User.objects.filter(id=user_id, is_active=True).exists()
+        if settings.AUTH_USER_CACHE_TTL:
+            cache.set(key, active, settings.AUTH_USER_CACHE_TTL)
+    return active
+
+
+def forget_user_active(user_id):
+    cache.delete(_active_key(user_id))
+
+
+# Backends whose entries only live in the current process
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def cache_is_shared():
+    return settings.CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES
+
+
+def _blacklist_key(jti):
+    return f"jwt-blacklisted:{jti}"
+
+
+def remember_blacklisted(jti, expires_at):
+    """Write-through: cache a blacklisted jti until the token would expire anyway"""
+    ttl = int((expires_at - timezone.now()).total_seconds())
+    if ttl > 0:
+        cache.set(_blacklist_key(jti), True, ttl)
+
+
+def forget_blacklisted(jti):
+    cache.delete(_blacklist_key(jti))
+
+
+class CachedRefreshToken(RefreshToken):
+    """
+    Refresh token whose blacklist check goes through the cache.
+
+    Blacklisted jtis are written to the cache when they are blacklisted (see
+    api.signals), which saves the query only in processes that share that
+    cache: with the default per-process cache other workers still ask the
+    database, so the check stays correct but gains little.
+
+    Tokens found not to be blacklisted are cached for
+    JWT_BLACKLIST_NEGATIVE_TTL seconds, and only with a shared cache
+    backend: a per-process entry would let another worker accept a token
+    for that long after it was rotated out or logged out.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        key = _blacklist_key(jti)
+        blacklisted = cache.get(key)
+        if blacklisted is None:
+            blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+            if not blacklisted and settings.JWT_BLACKLIST_NEGATIVE_TTL and cache_is_shared():
+                cache.set(key, False, settings.JWT_BLACKLIST_NEGATIVE_TTL)
+        if blacklisted:
+            raise TokenError(_("Token is blacklisted"))
+
+
+class ClaimsUser(TokenUser):
+    """
+    Request user built from token claims, without loading the User row.
+
+    Staff status and profile fields are as of token issue: changes take
+    effect when the client next refreshes (at most ACCESS_TOKEN_LIFETIME).
+    Deactivation and deletion are checked on every request through
+    ``user_is_active``.
+    """
+
+    @cached_property
+    def id(self):
+        # simplejwt stores the id claim as a string; compare equal to user_id columns
+        return User._meta.pk.to_python(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def email(self):
+        return self.token.get("email", "")
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips the per-request User lookup when the token
+    carries the user claims, keeping only the cached ``user_is_active``
+    check. Tokens issued before the claims existed fall back to the regular
+    database lookup.
+    """
+
+    def get_user(self, validated_token):
+        pin_if_recent_write(validated_token[api_settings.USER_ID_CLAIM])
+        claims = (api_settings.USER_ID_CLAIM,) + USER_CLAIMS
+        if all(claim in validated_token for claim in claims):
+            user = ClaimsUser(validated_token)
+            if not user_is_active(user.id):
+                raise AuthenticationFailed(_("User not found or inactive"), code="user_inactive")
+            return user
+        return super().get_user(validated_token)
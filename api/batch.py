@@ -0,0 +1,146 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.conf import settings
+
+from .containers import get_assistant
+
+
+class BatchError(ValueError):
+    pass
+
+
+class DedupingNewsFetcher:
+    """
+    Wraps a NewsFetcher for the lifetime of one batch so identical news
+    lookups are fetched once, even when several items ask concurrently.
+    """
+
+    def __init__(self, fetcher):
+        self.fetcher = fetcher
+        self._results = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.deduped = 0
+
+    def get_top_headlines(self, **params):
+        return self._once("headlines", self.fetcher.get_top_headlines, params)
+
+    def search_news(self, **params):
+        return self._once("search", self.fetcher.search_news, params)
+
+    def _once(self, kind, fetch, params):
+        key = (kind, json.dumps(params, sort_keys=True, default=str))
+        with self._lock:
+            self.lookups += 1
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        with key_lock:
+            if key in self._results:
+                with self._lock:
+                    self.deduped += 1
+                return self._results[key]
+            articles = fetch(**params)
+            self._results[key] = articles
+            return articles
+
+
+def parse_jsonl(lines):
+    """Parse JSONL chat requests: {"message": ..., "history": [...], "model": ..., "id": ...}"""
+    items = []
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode('utf-8')
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError as e:
+            raise BatchError(f"Line {number}: invalid JSON ({e})")
+        if not isinstance(item, dict) or not item.get('message'):
+            raise BatchError(f"Line {number}: 'message' is required")
+        if not isinstance(item['message'], str):
+            raise BatchError(f"Line {number}: 'message' must be a string")
+        if not isinstance(item.get('history', []), list):
+            raise BatchError(f"Line {number}: 'history' must be a list")
+        if not isinstance(item.get('model') or '', str):
+            raise BatchError(f"Line {number}: 'model' must be a string")
+        if len(item['message']) > settings.CHAT_MESSAGE_MAX_CHARS:
+            raise BatchError(f"Line {number}: 'message' is limited to {settings.CHAT_MESSAGE_MAX_CHARS} characters")
+        items.append(item)
+    if len(items) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise BatchError(f"Batch is limited to {settings.CHAT_BATCH_MAX_ITEMS} items")
+    return items
+
+
+def _percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def run_batch(items, concurrency=None):
+    """
+    Run chat requests through the assistant with bounded concurrency.
+
+    Yields one result dict per item as soon as it completes, followed by a
+    final ``{"summary": ...}`` dict with aggregate latency and token stats.
+    Nothing is saved to the database.
+    """
+    from .ai.model import AIAssistant
+
+    concurrency = max(1, min(concurrency or settings.CHAT_BATCH_CONCURRENCY, settings.CHAT_BATCH_MAX_CONCURRENCY))
+    shared = get_assistant()
+    news_fetcher = DedupingNewsFetcher(shared.news_fetcher)
+    assistant = AIAssistant(client=shared.client, news_fetcher=news_fetcher, router=shared.router)
+
+    def run_one(index, item):
+        started = time.perf_counter()
+        result = {'index': index, 'id': item.get('id', item.get('request_id'))}
+        try:
+            reply = assistant.chat(item['message'], item.get('history') or [], model=item.get('model'))
+            result.update({
+                'response': reply['response'],
+                'has_news_context': reply['has_news_context'],
+                'model': reply['model'],
+                'usage': reply['usage'],
+            })
+        except Exception as e:
+            result['error'] = str(e)
+        result['latency_ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    started = time.perf_counter()
+    latencies = []
+    tokens = {'prompt_tokens': 0, 'completion_tokens': 0, 'total_tokens': 0, 'cached_tokens': 0}
+    errors = 0
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="chat-batch") as executor:
+        futures = [executor.submit(run_one, index, item) for index, item in enumerate(items)]
+        for future in as_completed(futures):
+            result = future.result()
+            latencies.append(result['latency_ms'])
+            if 'error' in result:
+                errors += 1
+            else:
+                for key in tokens:
+                    tokens[key] += result['usage'][key]
+            yield result
+
+    yield {'summary': {
+        'items': len(items),
+        'errors': errors,
+        'concurrency': concurrency,
+        'wall_time_ms': round((time.perf_counter() - started) * 1000, 1),
+        'latency_ms': {
+            'mean': round(sum(latencies) / len(latencies), 1) if latencies else None,
+            'p50': _percentile(latencies, 0.5),
+            'p95': _percentile(latencies, 0.95),
+            'max': max(latencies) if latencies else None,
+        },
+        'tokens': tokens,
+        'news_lookups': news_fetcher.lookups,
+        'news_lookups_deduped': news_fetcher.deduped,
+    }}
@@ -0,0 +1,121 @@
+from rest_framework import status
+
+from .archive import ensure_hot
+from .containers import get_assistant
+from .models import Conversation, ChatMessage
+from .projections import conversation_payload
+from .sessions import get_history_store, new_token
+
+MAX_SESSION_TOKEN_LENGTH = 64
+
+
+class ChatError(Exception):
+    def __init__(self, message, status_code=status.HTTP_400_BAD_REQUEST):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def get_conversation_for(user, conversation_id):
+    try:
+        return Conversation.objects.get(id=conversation_id, user_id=user.id)
+    except Conversation.DoesNotExist:
+        raise ChatError('Conversation not found', status.HTTP_404_NOT_FOUND)
+
+
+def resume_session(token):
+    """
+    ``(token, history)`` of an anonymous session.
+
+    Only tokens the server issued and still holds are resumed; anything else
+    (unknown, expired or malformed) starts a new session under a fresh
+    server-generated token, so a client cannot pick its own session id.
+    """
+    if isinstance(token, str) and 0 < len(token) <= MAX_SESSION_TOKEN_LENGTH:
+        history = get_history_store().load(token)
+        if history is not None:
+            return token, history
+    return new_token(), []
+
+
+def run_turn(user, message, conversation_id=None, session_token=None, model=None,
+             user_message_id=None, on_user_message=None):
+    """
+    Run a single chat turn and return the response payload.
+
+    Messages are saved to the database when ``user`` is authenticated;
+    anonymous turns keep their history in the server-side session store
+    under ``session_token``. Shared by the chat view and the background
+    job workers.
+
+    A retried job passes the ``user_message_id`` its first run saved, and
+    the user message is not saved again. ``on_user_message`` is called with
+    the saved message, before the AI call.
+    """
+    conversation = None
+    last_assistant_offers_news = None
+    history = []
+
+    if user is not None and user.is_authenticated:
+        if conversation_id:
+            conversation = get_conversation_for(user, conversation_id)
+            ensure_hot(conversation)
+        else:
+            title = message[:50] + "..." if len(message) > 50 else message
+            conversation = Conversation.objects.create(user_id=user.id, title=title)
+
+        # History is read before the new message is saved: the assistant
+        # appends the current message itself, and a duplicate would also
+        # break the prompt prefix the provider cached on the previous turn.
+        history = []
+        messages = ChatMessage.objects.in_conversation(conversation.id, conversation.created_at)
+        if user_message_id:
+            messages = messages.exclude(id=user_message_id)
+        for msg in messages:
+            history.append({'role': msg.role, 'content': msg.content})
+            if msg.role == 'assistant':
+                last_assistant_offers_news = msg.offers_news
+
+        if not user_message_id:
+            user_message = ChatMessage.objects.create(
+                conversation=conversation,
+                role='user',
+                content=message
+            )
+            if on_user_message:
+                on_user_message(user_message)
+        # Bump updated_at now so conversation ETags change even if the AI call fails
+        conversation.save(update_fields=['updated_at'])
+    else:
+        session_token, history = resume_session(session_token)
+
+    # Pass model to AI assistant
+    result = get_assistant().chat(
+        message, history, model=model,
+        last_assistant_offers_news=last_assistant_offers_news,
+    )
+
+    if conversation:
+        ChatMessage.objects.create(
+            conversation=conversation,
+            role='assistant',
+            content=result['response'],
+            has_news_context=result.get('has_news_context', False),
+            offers_news=result.get('offers_news', False)
+        )
+        conversation.save()
+
+    response_data = {
+        'response': result['response'],
+        'has_news_context': result.get('has_news_context', False),
+        'model': result['model']  # Return which model was used
+    }
+
+    if conversation:
+        response_data['conversation_id'] = conversation.id
+        response_data['conversation'] = conversation_payload(conversation)
+    else:
+        get_history_store().save(session_token, result['conversation_history'])
+        response_data['session_token'] = session_token
+        response_data['history'] = result['conversation_history']
+
+    return response_data
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+from django.db import DEFAULT_DB_ALIAS
+
+
+def _same_database(alias):
+    """True for a replica alias pointing at the primary itself (DB_REPLICA_LOCAL)"""
+    primary, replica = settings.DATABASES[DEFAULT_DB_ALIAS], settings.DATABASES[alias]
+    return all(replica.get(key) == primary.get(key) for key in ("HOST", "PORT", "NAME"))
+
+
+@register(Tags.database, Tags.caches)
+def check_replica_pin_cache(app_configs, **kwargs):
+    """Read-your-writes pins (api.replicas) must be visible to every worker process"""
+    from .authentication import cache_is_shared
+
+    replicas = [alias for alias in settings.DATABASE_REPLICAS if not _same_database(alias)]
+    if not replicas or cache_is_shared():
+        return []
+    return [
+        Error(
+            "Read replicas need a shared default cache.",
+            hint=(
+                f"{', '.join(replicas)} may lag behind the primary, and the pins that keep a user's "
+                f"reads on the primary after a write are stored in CACHES['default'], which is "
+                f"{settings.CACHES['default']['BACKEND']} and so private to each process. Configure "
+                "a shared backend (Redis, Memcached, database) or remove DB_REPLICA_HOSTS."
+            ),
+            id="api.E001",
+        )
+    ]
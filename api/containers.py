@@ -1,10 +1,65 @@
-from .ai.mentor import MentorService
+import logging
+import threading
 
-mentor = None
+from django.conf import settings
 
+logger = logging.getLogger(__name__)
 
-def get_mentor():
-    global mentor
-    if mentor is None:
-        mentor = MentorService("1")
-    return mentor
+_assistant = None
+_assistant_lock = threading.Lock()
+
+
+def _build_openai_client():
+    import httpx
+    from openai import DefaultHttpxClient, OpenAI
+
+    http_client = DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=settings.AI_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.AI_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=settings.AI_HTTP_KEEPALIVE_EXPIRY,
+        ),
+        timeout=httpx.Timeout(settings.AI_HTTP_READ_TIMEOUT, connect=settings.AI_HTTP_CONNECT_TIMEOUT),
+    )
+    return OpenAI(api_key=settings.OPENAI_API_KEY, http_client=http_client)
+
+
+def _build_news_fetcher():
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    from .ai.news_fetcher import NewsFetcher
+
+    session = requests.Session()
+    session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=settings.AI_HTTP_MAX_CONNECTIONS))
+    return NewsFetcher(
+        session=session,
+        timeout=(settings.AI_HTTP_CONNECT_TIMEOUT, settings.AI_HTTP_READ_TIMEOUT),
+    )
+
+
+def get_assistant():
+    """
+    Return the per-process AIAssistant, building it on first use.
+
+    Construction is guarded by a lock so concurrent first requests in a
+    threaded worker share a single client and connection pool.
+    """
+    global _assistant
+    if _assistant is None:
+        with _assistant_lock:
+            if _assistant is None:
+                from .ai.model import AIAssistant
+
+                _assistant = AIAssistant(client=_build_openai_client(), news_fetcher=_build_news_fetcher())
+    return _assistant
+
+
+def warmup():
+    """Build the assistant and pre-open upstream connections before serving traffic"""
+    assistant = get_assistant()
+    try:
+        assistant.client.with_options(timeout=settings.AI_HTTP_CONNECT_TIMEOUT, max_retries=0).models.list()
+    except Exception as e:
+        logger.warning("OpenAI warmup failed: %s", e)
+    assistant.news_fetcher.warmup()
@@ -0,0 +1,51 @@
+"""
+Database connection metrics for GET /api/metrics/.
+
+Counts physical connections opened by this process (a steadily rising number
+means connections are not being reused) and, when the psycopg 3 pool is
+enabled, reports its wait time and utilization.
+"""
+import threading
+
+from django.db import connections
+
+_opened = {}
+_opened_lock = threading.Lock()
+
+
+def connection_opened(sender, connection, **kwargs):
+    """connection_created receiver, see api.signals"""
+    with _opened_lock:
+        _opened[connection.alias] = _opened.get(connection.alias, 0) + 1
+
+
+def _pool_stats(pool):
+    stats = pool.get_stats()
+    requests = stats.get('requests_num', 0)
+    in_use = stats.get('pool_size', 0) - stats.get('pool_available', 0)
+    return {
+        'min_size': stats.get('pool_min'),
+        'max_size': stats.get('pool_max'),
+        'size': stats.get('pool_size'),
+        'available': stats.get('pool_available'),
+        'waiting': stats.get('requests_waiting', 0),
+        'utilization': round(in_use / stats['pool_max'], 3) if stats.get('pool_max') else None,
+        'requests': requests,
+        'avg_wait_ms': round(stats.get('requests_wait_ms', 0) / requests, 2) if requests else 0,
+        'timeouts': stats.get('requests_errors', 0),
+    }
+
+
+def stats():
+    report = {}
+    for alias in connections:
+        settings_dict = connections.settings[alias]
+        entry = {
+            'conn_max_age': settings_dict.get('CONN_MAX_AGE', 0),
+            'health_checks': settings_dict.get('CONN_HEALTH_CHECKS', False),
+            'connections_opened': _opened.get(alias, 0),
+        }
+        if settings_dict.get('OPTIONS', {}).get('pool'):
+            entry['pool'] = _pool_stats(connections[alias].pool)
+        report[alias] = entry
+    return report
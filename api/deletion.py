@@ -0,0 +1,125 @@
+"""
+Two-phase conversation deletion.
+
+``soft_delete`` only stamps ``deleted_at``, which hides the conversations from
+every read path immediately (Conversation.objects filters them out). ``reap``
+later removes the messages in bounded raw-SQL batches and then the
+conversation rows themselves, so no request ever runs Django's cascade
+collector over a large history.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from .models import ChatMessage, Conversation, ConversationArchive
+
+logger = logging.getLogger(__name__)
+
+_reaper = None
+_reaper_lock = threading.Lock()
+_wakeup = threading.Event()
+
+
+def soft_delete(conversations):
+    """Hide a queryset of conversations and schedule their removal. Returns the count."""
+    conversations = conversations.filter(deleted_at__isnull=True)
+    deleted = conversations.update(deleted_at=timezone.now())
+    if deleted:
+        if settings.CONVERSATION_REAPER_BACKEND == 'thread':
+            transaction.on_commit(_start_reaper)
+    return deleted
+
+
+def _reap_conversation(conversation_id, batch_size, sleep):
+    """Delete one soft-deleted conversation's messages batch by batch, then the row"""
+    messages_table = connection.ops.quote_name(ChatMessage._meta.db_table)
+    messages = 0
+    while True:
+        # Not in_conversation(): a message stamped before its conversation
+        # (clock skew) must go too, or the conversation row can never be deleted.
+        rows = list(
+            ChatMessage.objects
+            .filter(conversation_id=conversation_id)
+            .order_by('id')
+            .values_list('id', 'created_at')[:batch_size]
+        )
+        if not rows:
+            break
+        # Short transaction per batch: locks only the rows being removed. The
+        # batch's own oldest timestamp still prunes the month partitions.
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {messages_table} WHERE created_at >= %s AND id = ANY(%s)",
+                [min(created_at for _, created_at in rows), [message_id for message_id, _ in rows]],
+            )
+            messages += cursor.rowcount
+        if sleep:
+            time.sleep(sleep)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(ConversationArchive._meta.db_table)} WHERE conversation_id = %s",
+            [conversation_id],
+        )
+        cursor.execute(
+            f"DELETE FROM {connection.ops.quote_name(Conversation._meta.db_table)} "
+            f"WHERE id = %s AND deleted_at IS NOT NULL",
+            [conversation_id],
+        )
+    return messages
+
+
+def reap(batch_size=None, sleep=None, limit=0):
+    """
+    Permanently remove soft-deleted conversations, oldest first.
+
+    Returns ``(conversations, messages)`` removed.
+    """
+    batch_size = batch_size or settings.CONVERSATION_REAPER_BATCH_SIZE
+    sleep = settings.CONVERSATION_REAPER_SLEEP if sleep is None else sleep
+    conversations = 0
+    messages = 0
+    while True:
+        pending = list(
+            Conversation.all_objects
+            .filter(deleted_at__isnull=False)
+            .order_by('deleted_at')
+            .values_list('id', flat=True)[:100]
+        )
+        if not pending:
+            break
+        for conversation_id in pending:
+            messages += _reap_conversation(conversation_id, batch_size, sleep)
+            conversations += 1
+            if limit and conversations >= limit:
+                return conversations, messages
+    return conversations, messages
+
+
+def _run_reaper():
+    while True:
+        _wakeup.wait()
+        _wakeup.clear()
+        close_old_connections()
+        try:
+            conversations, messages = reap()
+            if conversations:
+                logger.info("Reaped deleted conversations", extra={"conversations": conversations, "messages": messages})
+        except Exception:
+            logger.exception("Conversation reaper failed")
+        close_old_connections()
+
+
+def _start_reaper():
+    """Start the in-process reaper thread on first use and wake it up"""
+    global _reaper
+    if _reaper is None:
+        with _reaper_lock:
+            if _reaper is None:
+                _reaper = threading.Thread(target=_run_reaper, daemon=True, name="conversation-reaper")
+                _reaper.start()
+    _wakeup.set()
@@ -0,0 +1,65 @@
+"""
+Validators for conditional GETs on conversation endpoints.
+
+Each pair of functions reads one cheap aggregate from ``api_conversation``
+(never ``api_chatmessage``) and is used with ``django.views.decorators.http.condition``,
+so a matching ``If-None-Match`` / ``If-Modified-Since`` returns 304 before the
+view serializes anything. Conversation.updated_at is bumped on every message,
+rename and delete, which is what makes it a sound validator. Archiving and
+rehydrating leave updated_at alone (it drives list order and idleness), so
+the conversation ETag also carries ``is_archived``.
+"""
+from django.db.models import Count, Max
+
+from .models import Conversation
+
+
+def _memo(request, key, compute):
+    # etag and last_modified functions are both called per request; share the query
+    cache = getattr(request, '_etag_state', None)
+    if cache is None:
+        cache = request._etag_state = {}
+    if key not in cache:
+        cache[key] = compute()
+    return cache[key]
+
+
+def _conversation_state(request, conversation_id):
+    return _memo(request, ('conversation', conversation_id), lambda: (
+        Conversation.objects
+        .filter(id=conversation_id, user_id=request.user.id)
+        .values('updated_at', 'is_archived')
+        .first()
+    ))
+
+
+def conversation_list_state(request):
+    """The user's conversation count and latest updated_at, once per request"""
+    return _memo(request, ('list',), lambda: (
+        Conversation.objects
+        .filter(user_id=request.user.id)
+        .aggregate(count=Count('id'), updated_at=Max('updated_at'))
+    ))
+
+
+def conversation_etag(request, conversation_id):
+    state = _conversation_state(request, conversation_id)
+    if state is None:
+        return None
+    archived = 'a' if state['is_archived'] else 'h'
+    return f'W/"conversation-{conversation_id}-{state["updated_at"].timestamp()}-{archived}"'
+
+
+def conversation_last_modified(request, conversation_id):
+    state = _conversation_state(request, conversation_id)
+    return state['updated_at'] if state else None
+
+
+def conversation_list_etag(request):
+    state = conversation_list_state(request)
+    updated_at = state['updated_at'].timestamp() if state['updated_at'] else 0
+    return f'W/"conversations-{request.user.id}-{state["count"]}-{updated_at}"'
+
+
+def conversation_list_last_modified(request):
+    return conversation_list_state(request)['updated_at']
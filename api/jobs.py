@@ -0,0 +1,215 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from shared.log import request_id_var
+
+from .chat import ChatError, run_turn
+from .models import ChatJob
+from .replicas import record_write
+
+logger = logging.getLogger(__name__)
+
+_wakeup = threading.Event()
+_poller = None
+_poller_lock = threading.Lock()
+
+
+class QueueFull(Exception):
+    pass
+
+
+def owner_key_for(request):
+    """Key used for per-owner queue limits: the user, or the client IP for anonymous chat"""
+    if request.user.is_authenticated:
+        return f"user:{request.user.id}"
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    return f"ip:{forwarded.split(',')[0].strip() or request.META.get('REMOTE_ADDR', '')}"
+
+
+def enqueue(request, payload):
+    """Queue a chat turn for the requesting owner, enforcing the queue depth limit"""
+    owner_key = owner_key_for(request)
+    with transaction.atomic():
+        # Serialises count-then-create per owner; anonymous owners have no
+        # row to lock, so the lock is on the owner key itself.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [owner_key])
+        # Queued jobs count however long they have waited; running jobs past
+        # the stale cutoff were lost with their worker and are requeued.
+        active = ChatJob.objects.filter(
+            Q(status="queued") | Q(status="running", started_at__gte=_stale_cutoff()),
+            owner_key=owner_key,
+        ).count()
+        if active >= settings.CHAT_JOB_MAX_PER_USER:
+            raise QueueFull(f"Too many pending chat jobs (limit {settings.CHAT_JOB_MAX_PER_USER})")
+
+        job = ChatJob.objects.create(
+            user_id=request.user.id if request.user.is_authenticated else None,
+            owner_key=owner_key,
+            fair_seq=active,
+            payload=payload,
+        )
+    logger.info("Chat job queued", extra={"job_id": str(job.id), "owner_key": owner_key})
+    if settings.CHAT_JOB_BACKEND == 'thread':
+        transaction.on_commit(start_poller)
+    return job
+
+
+def claim_next():
+    """Atomically move the fairest queued job to running, or return None"""
+    with transaction.atomic():
+        job = (
+            ChatJob.objects.select_for_update(skip_locked=True)
+            .filter(status="queued")
+            .order_by("fair_seq", "created_at")
+            .first()
+        )
+        if job is None:
+            return None
+        job.status = "running"
+        job.started_at = timezone.now()
+        job.save(update_fields=["status", "started_at"])
+    return job
+
+
+def run_job(job):
+    payload = job.payload
+
+    def saved(message):
+        # Recorded before the AI call, so a requeued run reuses the
+        # conversation and message instead of saving them again
+        job.user_message_id = message.id
+        payload['conversation_id'] = message.conversation_id
+        job.save(update_fields=["user_message_id", "payload"])
+
+    token = request_id_var.set(f"job-{job.id}")
+    try:
+        job.result = run_turn(
+            job.user,
+            payload['message'],
+            conversation_id=payload.get('conversation_id'),
+            session_token=payload.get('session_token'),
+            model=payload.get('model'),
+            user_message_id=job.user_message_id,
+            on_user_message=saved,
+        )
+        job.status = "done"
+    except ChatError as e:
+        job.status = "failed"
+        job.error = str(e)
+    except Exception as e:
+        logger.exception("Chat job failed")
+        job.status = "failed"
+        job.error = str(e)
+    finally:
+        request_id_var.reset(token)
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "result", "error", "finished_at"])
+    record_write(job.user_id)
+
+
+def _stale_cutoff():
+    return timezone.now() - timedelta(seconds=settings.CHAT_JOB_STALE_AFTER)
+
+
+def requeue_stale():
+    """Put running jobs whose worker disappeared back in the queue"""
+    return ChatJob.objects.filter(status="running", started_at__lt=_stale_cutoff()).update(
+        status="queued", started_at=None
+    )
+
+
+def _requeue_on_start():
+    try:
+        requeued = requeue_stale()
+    except DatabaseError as e:
+        # e.g. started before migrate
+        logger.warning("Could not requeue stale chat jobs: %s", e)
+    else:
+        if requeued:
+            logger.info("Requeued stale chat jobs", extra={"jobs": requeued})
+
+
+def _run_on_worker(job, slots):
+    try:
+        run_job(job)
+    finally:
+        close_old_connections()
+        slots.release()
+
+
+def poll(stop=None, workers=None, idle_wait=5.0, once=False):
+    """
+    Claim queued jobs and run them on a pool of ``workers`` threads.
+
+    This is the only thread that polls the queue: it claims a job only once a
+    worker is free, and waits on the wakeup event (or ``idle_wait`` seconds)
+    while the queue is empty. Stale running jobs are requeued first. With
+    ``once`` it returns when the queue is empty. Returns the number of jobs run.
+    """
+    workers = workers or settings.CHAT_JOB_WORKERS
+    _requeue_on_start()
+    slots = threading.BoundedSemaphore(workers)
+    processed = 0
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="chat-job") as pool:
+        while stop is None or not stop.is_set():
+            if not slots.acquire(timeout=idle_wait):
+                continue
+            close_old_connections()
+            # Cleared before looking at the queue, so a job queued after the
+            # look still wakes the wait below.
+            _wakeup.clear()
+            try:
+                job = claim_next()
+            except DatabaseError as e:
+                logger.warning("Could not claim a chat job: %s", e)
+                job = None
+            if job is None:
+                slots.release()
+                if once:
+                    break
+                _wakeup.wait(idle_wait)
+                continue
+            pool.submit(_run_on_worker, job, slots)
+            processed += 1
+    close_old_connections()
+    return processed
+
+
+def start_poller():
+    """
+    Start this process's job poller, once, and wake it up.
+
+    Does not touch the database, so it is safe at WSGI import; the poller
+    requeues stale jobs when it starts. Called at WSGI startup and after
+    each enqueue.
+    """
+    global _poller
+    if _poller is None:
+        with _poller_lock:
+            if _poller is None:
+                _poller = threading.Thread(target=poll, daemon=True, name="chat-job-poller")
+                _poller.start()
+    _wakeup.set()
+
+
+def job_payload(job):
+    data = {
+        'job_id': str(job.id),
+        'status': job.status,
+        'created_at': job.created_at,
+        'started_at': job.started_at,
+        'finished_at': job.finished_at,
+    }
+    if job.status == "done":
+        data['result'] = job.result
+    elif job.status == "failed":
+        data['error'] = job.error
+    return data
@@ -0,0 +1,60 @@
+"""
+Per-user cache of the conversation list payload.
+
+Entries are keyed by the same database state the list ETag is built from
+(the user's conversation count and latest ``updated_at``, see api.etags), so
+any write that changes the list also changes the key and superseded entries
+simply expire. Nothing has to be invalidated, which keeps every worker
+correct even with a per-process cache; a shared backend only raises the hit
+rate. The state is read before the list is computed, so a list built while
+a write is in flight is stored under the older key.
+"""
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .projections import conversation_list_payload
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def _cache():
+    return caches[settings.CONVERSATION_LIST_CACHE_ALIAS]
+
+
+def _count(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get_conversation_list(user_id, state):
+    """
+    conversation_list_payload(user_id), served from the cache when possible.
+
+    ``state`` is etags.conversation_list_state() for the same user.
+    """
+    if not settings.CONVERSATION_LIST_CACHE_TTL:
+        return conversation_list_payload(user_id)
+
+    cache = _cache()
+    updated_at = state['updated_at'].timestamp() if state['updated_at'] else 0
+    key = f'conversation-list:{user_id}:{state["count"]}:{updated_at}'
+    payload = cache.get(key)
+    if payload is not None:
+        _count('hits')
+        return payload
+
+    _count('misses')
+    payload = conversation_list_payload(user_id)
+    cache.set(key, payload, settings.CONVERSATION_LIST_CACHE_TTL)
+    return payload
+
+
+def stats():
+    with _stats_lock:
+        snapshot = dict(_stats)
+    lookups = snapshot['hits'] + snapshot['misses']
+    snapshot['hit_rate'] = round(snapshot['hits'] / lookups, 3) if lookups else None
+    return snapshot
@@ -0,0 +1,98 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.archive import archive_conversation, rehydrate
+from api.models import ChatMessage, Conversation, ConversationArchive
+
+
+class Rollback(Exception):
+    pass
+
+
+def hot_table_bytes():
+    """On-disk size of the message table with its indexes and TOAST, summed over partitions"""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COALESCE(sum(pg_total_relation_size(relid)), pg_total_relation_size(%s::regclass)) "
+            "FROM pg_partition_tree(%s::regclass)",
+            [ChatMessage._meta.db_table] * 2,
+        )
+        return cursor.fetchone()[0]
+
+
+class Command(BaseCommand):
+    help = "Moves messages of idle conversations into compressed cold storage"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=settings.ARCHIVE_AFTER_DAYS,
+                            help="Archive conversations idle for more than this many days")
+        parser.add_argument("--limit", type=int, default=0, help="Archive at most this many conversations (0 = all)")
+        parser.add_argument("--sample-rehydration", type=int, default=5,
+                            help="Measure rehydration latency on this many archives (rolled back)")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options["days"])
+        candidates = (
+            Conversation.objects
+            .filter(is_archived=False, updated_at__lt=cutoff)
+            .order_by("updated_at")
+            .values_list("id", flat=True)
+        )
+        if options["limit"]:
+            candidates = candidates[:options["limit"]]
+
+        archived = 0
+        raw_total = 0
+        compressed_total = 0
+        size_before = hot_table_bytes()
+        started = time.monotonic()
+        for conversation_id in candidates.iterator(chunk_size=500):
+            result = archive_conversation(conversation_id, cutoff)
+            if result is None:
+                continue
+            archived += 1
+            raw_total += result[0]
+            compressed_total += result[1]
+
+        ratio = raw_total / compressed_total if compressed_total else 0
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {archived} conversations in {time.monotonic() - started:.1f}s: "
+            f"{raw_total / 1024:.1f} KiB of message JSON compressed to {compressed_total / 1024:.1f} KiB "
+            f"({ratio:.1f}x)"
+        ))
+        # Deleted rows stay on disk until VACUUM makes them reusable; the
+        # files only shrink with VACUUM FULL or pg_repack.
+        self.stdout.write(
+            f"{ChatMessage._meta.db_table} on disk: {size_before / 2**20:.1f} MiB before, "
+            f"{hot_table_bytes() / 2**20:.1f} MiB after"
+        )
+
+        if options["sample_rehydration"]:
+            self._measure_rehydration(options["sample_rehydration"])
+
+    def _measure_rehydration(self, sample):
+        conversation_ids = list(
+            ConversationArchive.objects.order_by("?").values_list("conversation_id", flat=True)[:sample]
+        )
+        if not conversation_ids:
+            return
+        timings = []
+        try:
+            with transaction.atomic():
+                for conversation_id in conversation_ids:
+                    started = time.perf_counter()
+                    rehydrate(conversation_id)
+                    timings.append((time.perf_counter() - started) * 1000)
+                raise Rollback
+        except Rollback:
+            pass
+        timings.sort()
+        self.stdout.write(
+            f"Rehydration latency over {len(timings)} archives: "
+            f"p50 {timings[len(timings) // 2]:.1f} ms, max {timings[-1]:.1f} ms"
+        )
@@ -0,0 +1,64 @@
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.ai.intent import OTHER, classify, offers_news
+
+DEFAULT_CORPUS = Path(__file__).resolve().parents[2] / "ai" / "intent_corpus.jsonl"
+
+
+class Command(BaseCommand):
+    help = "Measures accuracy and speed of the news intent classifier against a labeled corpus"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=str(DEFAULT_CORPUS), help="JSONL file of labeled messages")
+        parser.add_argument("--iterations", type=int, default=2000, help="Passes over the corpus for timing")
+        parser.add_argument("--min-accuracy", type=float, default=0.0, help="Fail when accuracy drops below this")
+
+    def handle(self, *args, **options):
+        samples = self._load(options["corpus"])
+        if not samples:
+            raise CommandError("Corpus is empty")
+
+        errors = Counter()
+        mistakes = []
+        for sample in samples:
+            predicted = self._predict(sample)
+            if predicted != sample["label"]:
+                errors[(sample["label"], predicted)] += 1
+                mistakes.append(sample)
+
+        accuracy = 1 - len(mistakes) / len(samples)
+        self.stdout.write(f"Samples:  {len(samples)}")
+        self.stdout.write(f"Accuracy: {accuracy:.1%}")
+        for (expected, predicted), count in errors.most_common():
+            self.stdout.write(f"  {expected} -> {predicted}: {count}")
+        for sample in mistakes:
+            self.stdout.write(f"  miss: {sample['text']!r}")
+
+        iterations = options["iterations"]
+        started = time.perf_counter()
+        for _ in range(iterations):
+            for sample in samples:
+                self._predict(sample)
+        elapsed = time.perf_counter() - started
+        calls = iterations * len(samples)
+        self.stdout.write(f"Speed:    {elapsed / calls * 1e6:.2f} us/message ({calls} calls)")
+
+        if accuracy < options["min_accuracy"]:
+            raise CommandError(f"Accuracy {accuracy:.1%} is below {options['min_accuracy']:.1%}")
+
+    def _predict(self, sample):
+        if sample["role"] == "assistant":
+            return "offer" if offers_news(sample["text"]) else OTHER
+        return classify(sample["text"]).label
+
+    def _load(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                return [json.loads(line) for line in f if line.strip()]
+        except OSError as e:
+            raise CommandError(f"Cannot read corpus: {e}")
@@ -0,0 +1,154 @@
+import random
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.partitions import add_months, month_start
+
+PLAIN = "bench_messages_plain"
+PARTITIONED = "bench_messages_part"
+
+COLUMNS = """
+    id bigint NOT NULL,
+    conversation_id bigint NOT NULL,
+    role varchar(20) NOT NULL,
+    content text NOT NULL,
+    created_at timestamptz NOT NULL
+"""
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compares insert and read latency of a month-partitioned message table with an "
+        "unpartitioned one, on temporary tables seeded at scale (PostgreSQL only)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000)
+        parser.add_argument("--months", type=int, default=24, help="Months of history the rows span")
+        parser.add_argument("--messages-per-conversation", type=int, default=40)
+        parser.add_argument("--samples", type=int, default=300)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("bench_partitions needs PostgreSQL")
+        try:
+            with transaction.atomic(), connection.cursor() as cursor:
+                self._seed(cursor, options)
+                self._bench(cursor, options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _seed(self, cursor, options):
+        now = timezone.now()
+        first = add_months(month_start(now), -options["months"] + 1)
+        last = add_months(month_start(now), 1)
+
+        cursor.execute(f"CREATE TEMP TABLE {PLAIN} ({COLUMNS}, PRIMARY KEY (id))")
+        cursor.execute(
+            f"CREATE TEMP TABLE {PARTITIONED} ({COLUMNS}, PRIMARY KEY (id, created_at)) PARTITION BY RANGE (created_at)"
+        )
+        month = first
+        while month < last:
+            cursor.execute(
+                f"CREATE TEMP TABLE {PARTITIONED}_{month:%Y_%m} PARTITION OF {PARTITIONED} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+            )
+            month = add_months(month, 1)
+
+        started = time.monotonic()
+        span = (now - first).total_seconds()
+        # Consecutive ids belong to the same conversation and time only moves
+        # forward, as with real chat traffic.
+        for table in (PLAIN, PARTITIONED):
+            cursor.execute(
+                f"""
+                INSERT INTO {table} (id, conversation_id, role, content, created_at)
+                SELECT g, g / %s + 1,
+                       CASE WHEN g %% 2 = 0 THEN 'user' ELSE 'assistant' END,
+                       repeat(md5(g::text), 8),
+                       %s::timestamptz + (g::float8 / %s) * %s * interval '1 second'
+                FROM generate_series(1, %s) AS g
+                """,
+                [options["messages_per_conversation"], first, options["rows"], span, options["rows"]],
+            )
+            cursor.execute(f"CREATE INDEX ON {table} (conversation_id, created_at)")
+            cursor.execute(f"ANALYZE {table}")
+        self.stdout.write(
+            f"Seeded {options['rows']} rows over {options['months']} months in {time.monotonic() - started:.1f}s"
+        )
+
+    def _bench(self, cursor, options):
+        conversations = options["rows"] // options["messages_per_conversation"]
+        sample = [random.randint(1, conversations) for _ in range(options["samples"])]
+        cursor.execute(
+            f"SELECT conversation_id, min(created_at) FROM {PLAIN} WHERE conversation_id = ANY(%s) GROUP BY 1",
+            [sample],
+        )
+        # Bounded like ChatMessage.objects.in_conversation, clock margin included
+        margin = timedelta(seconds=settings.CHAT_MESSAGE_CLOCK_MARGIN)
+        starts = {conversation_id: start - margin for conversation_id, start in cursor.fetchall()}
+
+        # (label, SQL, bounded by the conversation's start)
+        queries = [
+            ("conversation messages", "SELECT id, role, content, created_at FROM {table} "
+             "WHERE conversation_id = %s AND created_at >= %s ORDER BY created_at", True),
+            ("latest message", "SELECT role, left(content, 100) FROM {table} "
+             "WHERE conversation_id = %s AND created_at >= %s ORDER BY created_at DESC, id DESC LIMIT 1", True),
+            ("messages without bound", "SELECT id, role, content, created_at FROM {table} "
+             "WHERE conversation_id = %s ORDER BY created_at", False),
+        ]
+        for label, sql, bounded in queries:
+            for table in (PLAIN, PARTITIONED):
+                statement = sql.format(table=table)
+                timings = []
+                for conversation_id in sample:
+                    params = [conversation_id, starts[conversation_id]] if bounded else [conversation_id]
+                    started = time.perf_counter()
+                    cursor.execute(statement, params)
+                    cursor.fetchall()
+                    timings.append((time.perf_counter() - started) * 1000)
+                self._report(f"{label} [{table}]", timings)
+                if table == PARTITIONED:
+                    self.stdout.write(f"    partitions scanned: {self._partitions_scanned(cursor, statement, params)}")
+
+        insert = (
+            "INSERT INTO {table} (id, conversation_id, role, content, created_at) "
+            "VALUES (%s, %s, 'user', %s, now())"
+        )
+        for table in (PLAIN, PARTITIONED):
+            timings = []
+            for i in range(options["samples"]):
+                started = time.perf_counter()
+                cursor.execute(insert.format(table=table), [options["rows"] + 1 + i, conversations + 1, "x" * 200])
+                timings.append((time.perf_counter() - started) * 1000)
+            self._report(f"single-row insert [{table}]", timings)
+
+        # The per-partition indexes are a fraction of the single big one
+        for table in (PLAIN, PARTITIONED):
+            cursor.execute(
+                "SELECT pg_size_pretty(sum(pg_relation_size(indexrelid))) FROM pg_index "
+                "WHERE indrelid IN (SELECT %s::regclass UNION SELECT inhrelid FROM pg_inherits WHERE inhparent = %s::regclass)",
+                [table, table],
+            )
+            self.stdout.write(f"index size [{table}]: {cursor.fetchone()[0]}")
+
+    def _partitions_scanned(self, cursor, statement, params):
+        cursor.execute("EXPLAIN (ANALYZE, COSTS OFF) " + statement, params)
+        plan = "\n".join(row[0] for row in cursor.fetchall())
+        return plan.count(f"on {PARTITIONED}_")
+
+    def _report(self, label, timings):
+        timings.sort()
+        self.stdout.write(
+            f"{label:<48} p50 {timings[len(timings) // 2]:7.3f} ms   p95 {timings[int(len(timings) * 0.95)]:7.3f} ms"
+        )
@@ -0,0 +1,95 @@
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from api import projections
+from api.models import ChatMessage, Conversation
+from api.serializers import ConversationListSerializer, ConversationSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures the per-row cost of the projection read path against the serializers. "
+        "Seeded data is rolled back; api.tests.test_projections checks the output matches."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--conversations", type=int, default=50)
+        parser.add_argument("--messages", type=int, default=200, help="Messages per conversation")
+        parser.add_argument("--iterations", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                user = self._seed(options["conversations"], options["messages"])
+                self._bench(user, options["iterations"], options["messages"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _seed(self, conversations, messages):
+        User = get_user_model()
+        user = User.objects.create(username=f"projection-check-{time.time_ns()}")
+        now = timezone.now()
+        created = Conversation.objects.bulk_create(
+            [Conversation(user=user, title=f"Conversation {i} ünïcödé") for i in range(conversations)]
+        )
+        # An empty conversation exercises the null last_message branch
+        created = created[:-1]
+        for conversation in created:
+            ChatMessage.objects.bulk_create(
+                [
+                    ChatMessage(
+                        conversation=conversation,
+                        role="user" if i % 2 == 0 else "assistant",
+                        content=f"Message {i} " + "é" * (i % 150) + " 🚀",
+                        has_news_context=i % 3 == 0,
+                    )
+                    for i in range(messages)
+                ],
+                batch_size=1000,
+            )
+        # auto_now_add stamps every row at insert time; spread them out, and
+        # keep every conversation older than its messages as in real data
+        seeded = list(ChatMessage.objects.filter(conversation__user=user).only("id"))
+        for i, message in enumerate(seeded):
+            message.created_at = now - timedelta(seconds=i)
+        ChatMessage.objects.bulk_update(seeded, ["created_at"], batch_size=1000)
+        Conversation.objects.filter(user=user).update(created_at=now - timedelta(seconds=len(seeded) + 1))
+        return user
+
+    def _bench(self, user, iterations, messages):
+        conversation = Conversation.objects.filter(user=user).first()
+        conversations = Conversation.objects.filter(user=user)
+        rows = conversations.count()
+
+        def timed(fn):
+            started = time.perf_counter()
+            for _ in range(iterations):
+                fn()
+            return (time.perf_counter() - started) / iterations
+
+        cases = [
+            ("Conversation detail", messages,
+             lambda: ConversationSerializer(Conversation.objects.get(id=conversation.id)).data,
+             lambda: projections.get_conversation_payload(user.id, conversation.id)),
+            ("Conversation list", rows,
+             lambda: ConversationListSerializer(conversations.all(), many=True).data,
+             lambda: projections.conversation_list_payload(user.id)),
+        ]
+        for label, count, serializer_fn, projection_fn in cases:
+            serializer_time = timed(serializer_fn)
+            projection_time = timed(projection_fn)
+            self.stdout.write(
+                f"{label} ({count} rows): serializer {serializer_time / count * 1e6:.1f} us/row, "
+                f"projection {projection_time / count * 1e6:.1f} us/row "
+                f"({serializer_time / projection_time:.1f}x)"
+            )
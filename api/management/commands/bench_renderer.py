@@ -0,0 +1,63 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.utils import timezone
+from djangorestframework_camel_case.render import CamelCaseJSONRenderer
+from rest_framework.renderers import JSONRenderer
+
+from api.models import ChatMessage
+from api.renderers import FastJSONRenderer
+from api.serializers import ChatMessageSerializer
+
+
+class Command(BaseCommand):
+    help = "Compares the fast JSON renderer with the stock DRF renderers on a large conversation payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1000)
+        parser.add_argument("--iterations", type=int, default=50)
+
+    def handle(self, *args, **options):
+        payload = self._payload(options["messages"])
+        iterations = options["iterations"]
+
+        results = [
+            ("DRF JSONRenderer", JSONRenderer(), False),
+            ("FastJSONRenderer", FastJSONRenderer(), False),
+            ("CamelCaseJSONRenderer", CamelCaseJSONRenderer(), True),
+            ("FastJSONRenderer (camel)", FastJSONRenderer(), True),
+        ]
+        baseline = None
+        for label, renderer, camel in results:
+            with override_settings(API_CAMEL_CASE=camel):
+                renderer.render(payload)  # warm up key maps
+                started = time.perf_counter()
+                for _ in range(iterations):
+                    body = renderer.render(payload)
+                elapsed = (time.perf_counter() - started) / iterations * 1000
+            if baseline is None:
+                baseline = elapsed
+            self.stdout.write(f"{label:<28} {elapsed:8.2f} ms/render  {baseline / elapsed:5.1f}x  {len(body)} bytes")
+
+    def _payload(self, count):
+        """ConversationSerializer-shaped data built from unsaved messages"""
+        now = timezone.now()
+        messages = [
+            ChatMessage(
+                id=i,
+                role="user" if i % 2 == 0 else "assistant",
+                content=("Here are today's top technology headlines with sources and summaries. " * 8)[: 100 + (i % 7) * 90],
+                has_news_context=i % 5 == 0,
+                created_at=now - timedelta(seconds=count - i),
+            )
+            for i in range(1, count + 1)
+        ]
+        return {
+            "id": 1,
+            "title": "Benchmark conversation",
+            "created_at": (now - timedelta(days=1)).isoformat(),
+            "updated_at": now.isoformat(),
+            "messages": ChatMessageSerializer(messages, many=True).data,
+        }
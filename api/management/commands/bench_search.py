@@ -0,0 +1,96 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from api.models import Conversation
+from api.search import search_messages
+
+BENCH_USERNAME = "search-bench"
+
+WORDS = [
+    "election", "market", "climate", "policy", "football", "vaccine", "startup", "security",
+    "python", "database", "inflation", "energy", "satellite", "privacy", "music", "travel",
+    "recipe", "budget", "court", "research", "battery", "weather", "museum", "protest",
+]
+
+SEED_MESSAGES = """
+INSERT INTO api_chatmessage (conversation_id, role, content, has_news_context, offers_news, created_at)
+SELECT
+    c.ids[1 + (n %% array_length(c.ids, 1))],
+    CASE WHEN n %% 2 = 0 THEN 'user' ELSE 'assistant' END,
+    (
+        SELECT string_agg(w.words[1 + floor(random() * array_length(w.words, 1))::int], ' ')
+        FROM generate_series(1, 20 + (n %% 60)), (SELECT %s::text[] AS words) w
+    ),
+    false,
+    false,
+    now() - (n || ' seconds')::interval
+FROM generate_series(1, %s) AS n,
+     (SELECT array_agg(id) AS ids FROM api_conversation WHERE user_id = %s) c
+"""
+
+
+class Command(BaseCommand):
+    help = "Seeds a large messages table and measures full-text search latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000, help="Messages to seed for the bench user")
+        parser.add_argument("--conversations", type=int, default=2000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--skip-seed", action="store_true", help="Reuse previously seeded data")
+        parser.add_argument("--cleanup", action="store_true", help="Delete the bench user and its data afterwards")
+
+    def handle(self, *args, **options):
+        User = get_user_model()
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+
+        if not options["skip_seed"]:
+            self._seed(user, options["rows"], options["conversations"])
+
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM api_chatmessage")
+            total = cursor.fetchone()[0]
+        self.stdout.write(f"Messages table: {total} rows")
+
+        first_page = []
+        next_page = []
+        for _ in range(options["queries"]):
+            text = " ".join(random.sample(WORDS, random.choice([1, 2])))
+            started = time.perf_counter()
+            page = search_messages(user, text)
+            first_page.append(time.perf_counter() - started)
+            if page["next_cursor"]:
+                started = time.perf_counter()
+                search_messages(user, text, cursor=page["next_cursor"])
+                next_page.append(time.perf_counter() - started)
+
+        self._report("First page", first_page)
+        self._report("Next page", next_page)
+
+        if options["cleanup"]:
+            user.delete()
+            self.stdout.write("Removed bench data")
+
+    def _seed(self, user, rows, conversations):
+        Conversation.objects.filter(user=user).delete()
+        Conversation.objects.bulk_create(
+            [Conversation(user=user, title=f"Bench {i}") for i in range(conversations)],
+            batch_size=1000,
+        )
+        started = time.perf_counter()
+        with connection.cursor() as cursor:
+            cursor.execute(SEED_MESSAGES, [WORDS, rows, user.id])
+            cursor.execute("ANALYZE api_chatmessage")
+        self.stdout.write(f"Seeded {rows} messages in {time.perf_counter() - started:.1f}s")
+
+    def _report(self, label, timings):
+        if not timings:
+            self.stdout.write(f"{label}: no samples")
+            return
+        timings = sorted(t * 1000 for t in timings)
+        p50 = timings[len(timings) // 2]
+        p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+        self.stdout.write(f"{label}: p50 {p50:.1f} ms, p95 {p95:.1f} ms, max {timings[-1]:.1f} ms ({len(timings)} queries)")
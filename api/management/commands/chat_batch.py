@@ -0,0 +1,35 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.batch import BatchError, parse_jsonl, run_batch
+
+
+class Command(BaseCommand):
+    help = "Runs a JSONL file of chat requests through the assistant and writes JSONL results"
+
+    def add_arguments(self, parser):
+        parser.add_argument("input", help="JSONL file of chat requests, or - for stdin")
+        parser.add_argument("--output", help="Write results here instead of stdout")
+        parser.add_argument("--concurrency", type=int, help="Concurrent chat calls")
+
+    def handle(self, *args, **options):
+        try:
+            if options["input"] == "-":
+                items = parse_jsonl(sys.stdin)
+            else:
+                with open(options["input"], encoding="utf-8") as f:
+                    items = parse_jsonl(f)
+        except (OSError, BatchError) as e:
+            raise CommandError(str(e))
+
+        out = open(options["output"], "w", encoding="utf-8") if options["output"] else self.stdout
+        try:
+            for result in run_batch(items, options["concurrency"]):
+                out.write(json.dumps(result, default=str) + "\n")
+                if "summary" in result:
+                    self.stderr.write(json.dumps(result["summary"], indent=2))
+        finally:
+            if out is not self.stdout:
+                out.close()
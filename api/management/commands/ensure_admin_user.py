@@ -2,11 +2,8 @@ import os
 
 from django.contrib.auth import get_user_model
 from django.core.management.base import BaseCommand
-from dotenv import load_dotenv
 import shared.config as config
 
-load_dotenv()
-
 
 class Command(BaseCommand):
     help = "Creates an admin user non-interactively if it doesn't exist"
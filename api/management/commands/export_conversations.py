@@ -0,0 +1,50 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.models import Conversation
+from api.transfer import export_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Streams conversations and their messages (archived ones included) as JSONL, "
+        "in constant memory. Import with `manage.py import_conversations`."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="-", help="File to write, - for stdout")
+        parser.add_argument("--user", action="append", default=[], help="Only this username (repeatable)")
+        parser.add_argument("--chunk-size", type=int, default=None,
+                            help="Rows per database round trip (default TRANSFER_CHUNK_SIZE)")
+
+    def handle(self, *args, **options):
+        conversations = Conversation.objects.all()
+        if options["user"]:
+            conversations = conversations.filter(user__username__in=options["user"])
+
+        out = sys.stdout if options["output"] == "-" else open(options["output"], "w", encoding="utf-8")
+        started = time.monotonic()
+        lines = 0
+        try:
+            for line in export_lines(conversations, options["chunk_size"]):
+                out.write(line)
+                lines += 1
+                if lines % 100_000 == 0:
+                    self._progress(lines, started)
+        except OSError as e:
+            raise CommandError(f"Could not write {options['output']}: {e}")
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        elapsed = time.monotonic() - started
+        # Progress goes to stderr so stdout can be piped
+        self.stderr.write(self.style.SUCCESS(
+            f"Exported {lines} lines in {elapsed:.1f}s ({lines / elapsed if elapsed else 0:.0f} lines/s)"
+        ))
+
+    def _progress(self, lines, started):
+        elapsed = time.monotonic() - started
+        self.stderr.write(f"  {lines} lines, {lines / elapsed if elapsed else 0:.0f} lines/s")
@@ -0,0 +1,55 @@
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from api.transfer import TransferError, import_lines
+
+
+class Command(BaseCommand):
+    help = (
+        "Imports a JSONL file written by `manage.py export_conversations`, in batches "
+        "that each commit on their own. Conversations get new ids; timestamps are kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to read, - for stdin")
+        parser.add_argument("--batch-size", type=int, default=None,
+                            help="Rows per transaction (default TRANSFER_CHUNK_SIZE)")
+        parser.add_argument("--user", help="Give every conversation to this username instead of the one in the file")
+        parser.add_argument("--create-users", action="store_true",
+                            help="Create users missing from this database (with unusable passwords)")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            user = User.objects.filter(username=options["user"]).first()
+            if user is None:
+                raise CommandError(f"No user {options['user']!r}")
+
+        source = sys.stdin if options["path"] == "-" else open(options["path"], encoding="utf-8")
+        try:
+            importer = import_lines(
+                source,
+                batch_size=options["batch_size"],
+                user=user,
+                create_users=options["create_users"],
+                progress=self._progress,
+            )
+        except TransferError as e:
+            # Batches committed before the bad line stay imported
+            raise CommandError(f"{e}; earlier batches were imported")
+        finally:
+            if source is not sys.stdin:
+                source.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {importer.conversation_count} conversations, {importer.message_count} messages"
+        ))
+
+    def _progress(self, importer, elapsed):
+        rows = importer.conversation_count + importer.message_count
+        self.stdout.write(
+            f"  {importer.conversation_count} conversations, {importer.message_count} messages "
+            f"in {elapsed:.1f}s ({rows / elapsed if elapsed else 0:.0f} rows/s)"
+        )
@@ -0,0 +1,76 @@
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What a worker does before serving its first request
+STARTUP = """
+import time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+for name in {modules!r}:
+    __import__(name)
+print(round((time.perf_counter() - started) * 1000, 1))
+"""
+
+# Imported on the first chat request, never at startup
+LAZY = ["openai", "httpx", "api.ai.model"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts Django in a fresh interpreter under `python -X importtime` and reports "
+        "which modules the startup time goes to. Fails if a lazily loaded module "
+        "(the OpenAI client and the assistant) is imported at startup."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20)
+        parser.add_argument("--module", action="append", default=[],
+                            help="Also import this module, e.g. api.ai.model to see the cost of the AI stack")
+        parser.add_argument("--allow-eager", action="store_true",
+                            help="Report modules that should be lazy instead of failing")
+
+    def handle(self, *args, **options):
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "app.settings"),
+               "AI_WARMUP": "false"}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", STARTUP.format(modules=options["module"])],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Startup failed:\n{result.stderr[-2000:]}")
+
+        modules = []
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+            modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+        imported = {name for name, _, _ in modules}
+        by_package = defaultdict(int)
+        for name, self_us, _ in modules:
+            by_package[name.split(".")[0]] += self_us
+
+        self.stdout.write(f"Startup: {result.stdout.strip().splitlines()[-1]} ms, {len(modules)} modules imported")
+        self.stdout.write(f"\nTop {options['top']} packages by import time:")
+        for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:options["top"]]:
+            self.stdout.write(f"  {self_us / 1000:9.1f} ms  {package}")
+        self.stdout.write(f"\nTop {options['top']} modules by cumulative time:")
+        for name, _, cumulative_us in sorted(modules, key=lambda module: -module[2])[:options["top"]]:
+            self.stdout.write(f"  {cumulative_us / 1000:9.1f} ms  {name}")
+
+        eager = [name for name in LAZY if name in imported and name not in options["module"]]
+        if eager and not options["allow_eager"]:
+            raise CommandError(f"Imported at startup but should load lazily: {', '.join(eager)}")
+        if eager:
+            self.stdout.write(self.style.WARNING(f"\nImported at startup: {', '.join(eager)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"\nNot imported at startup: {', '.join(LAZY)}"))
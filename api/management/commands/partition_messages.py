@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from api import partitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Maintains monthly partitions of the chat message table: converts it once "
+        "(--convert), creates upcoming months and detaches or drops old ones. "
+        "Run it daily from cron."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--convert", action="store_true",
+                            help="Rebuild the unpartitioned table as a partitioned one (locks it while copying)")
+        parser.add_argument("--ahead", type=int, default=3, help="Months of partitions to keep created ahead")
+        parser.add_argument("--detach-older-than", type=int, default=0, metavar="MONTHS",
+                            help="Detach monthly partitions older than this many months (0 = keep all)")
+        parser.add_argument("--drop", action="store_true", help="Drop detached partitions instead of keeping them")
+        parser.add_argument("--force", action="store_true", help="Detach partitions even if they still hold rows")
+
+    def handle(self, *args, **options):
+        try:
+            if options["convert"]:
+                copied = partitions.convert(ahead=options["ahead"])
+                self.stdout.write(self.style.SUCCESS(f"Converted {partitions.TABLE}: {copied} rows copied"))
+
+            for name in partitions.ensure_partitions(ahead=options["ahead"]):
+                self.stdout.write(f"Created {name}")
+
+            if options["detach_older_than"]:
+                for name, rows, action in partitions.detach_older_than(
+                    options["detach_older_than"], drop=options["drop"], force=options["force"],
+                ):
+                    if action == "skipped":
+                        self.stdout.write(self.style.WARNING(f"Skipped {name}: {rows} rows left (use --force)"))
+                    else:
+                        self.stdout.write(f"{action.capitalize()} {name} ({rows} rows)")
+        except partitions.PartitionError as e:
+            raise CommandError(str(e))
+
+        with connection.cursor() as cursor:
+            for name, month, rows in partitions.partitions(cursor):
+                self.stdout.write(f"  {name:<32} ~{rows} rows")
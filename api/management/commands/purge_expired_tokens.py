@@ -0,0 +1,55 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = "Deletes expired outstanding and blacklisted JWT refresh tokens in small batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000, help="Tokens deleted per transaction")
+        parser.add_argument("--sleep", type=float, default=0.05, help="Pause between batches, in seconds")
+        parser.add_argument("--max-batches", type=int, default=0, help="Stop after this many batches (0 = no limit)")
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        outstanding_table = connection.ops.quote_name(OutstandingToken._meta.db_table)
+        blacklisted_table = connection.ops.quote_name(BlacklistedToken._meta.db_table)
+
+        batches = 0
+        outstanding_deleted = 0
+        blacklisted_deleted = 0
+        started = time.monotonic()
+        while True:
+            # Each batch is its own short transaction, keyed by primary key, so
+            # locks are held only on the rows being removed.
+            ids = list(
+                OutstandingToken.objects
+                .filter(expires_at__lt=now)
+                .order_by("id")
+                .values_list("id", flat=True)[:options["batch_size"]]
+            )
+            if not ids:
+                break
+
+            # Raw deletes skip Django's cascade collector, which would load
+            # every row and fire per-row signals.
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(f"DELETE FROM {blacklisted_table} WHERE token_id = ANY(%s)", [ids])
+                blacklisted_deleted += cursor.rowcount
+                cursor.execute(f"DELETE FROM {outstanding_table} WHERE id = ANY(%s)", [ids])
+                outstanding_deleted += cursor.rowcount
+
+            batches += 1
+            if options["max_batches"] and batches >= options["max_batches"]:
+                break
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {outstanding_deleted} outstanding and {blacklisted_deleted} blacklisted tokens "
+            f"in {batches} batches ({time.monotonic() - started:.1f}s)"
+        ))
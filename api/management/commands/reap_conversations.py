@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.deletion import reap
+
+
+class Command(BaseCommand):
+    help = "Permanently removes soft-deleted conversations in small batches (use with CONVERSATION_REAPER_BACKEND=command)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=None, help="Messages deleted per transaction")
+        parser.add_argument("--sleep", type=float, default=None, help="Pause between batches, in seconds")
+        parser.add_argument("--limit", type=int, default=0, help="Stop after this many conversations (0 = no limit)")
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        conversations, messages = reap(options["batch_size"], options["sleep"], options["limit"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Removed {conversations} conversations and {messages} messages ({time.monotonic() - started:.1f}s)"
+        ))
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from api import jobs
+
+
+class Command(BaseCommand):
+    help = "Runs queued background chat jobs (use with CHAT_JOB_BACKEND=db)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=4, help="Number of worker threads")
+        parser.add_argument("--once", action="store_true", help="Exit when the queue is empty")
+
+    def handle(self, *args, **options):
+        # On Ctrl-C the poller stops claiming and running jobs are finished
+        processed = jobs.poll(workers=options["workers"], idle_wait=1.0, once=options["once"])
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} jobs"))
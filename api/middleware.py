@@ -0,0 +1,89 @@
+import logging
+import re
+import time
+import uuid
+
+from shared.log import elapsed_ms, request_id_var
+
+from . import profiling
+from .replicas import record_write, replica_reads
+
+logger = logging.getLogger("api.request")
+
+# Client-supplied ids are only trusted when they look like ids
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+
+
+class RequestLogMiddleware:
+    """
+    Tags each request with an id (X-Request-ID, or a new one) that every log
+    record emitted while handling it carries, and logs one timing line per request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_id = request.headers.get("X-Request-ID", "")
+        if not _REQUEST_ID_RE.match(request_id):
+            request_id = uuid.uuid4().hex
+        request.request_id = request_id
+        token = request_id_var.set(request_id)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+            response["X-Request-ID"] = request_id
+            logger.info(
+                "%s %s %s", request.method, request.path, response.status_code,
+                extra={
+                    "method": request.method,
+                    "path": request.path,
+                    "status": response.status_code,
+                    "duration_ms": elapsed_ms(started),
+                },
+            )
+            return response
+        finally:
+            request_id_var.reset(token)
+
+
+class ReplicaMiddleware:
+    """
+    Serves safe requests from the read replicas (see api.replicas) and pins
+    the user to the primary after a successful write.
+    """
+
+    SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.method in self.SAFE_METHODS:
+            with replica_reads():
+                return self.get_response(request)
+
+        response = self.get_response(request)
+        # DRF copies the authenticated user back onto the Django request
+        user = getattr(request, "user", None)
+        if response.status_code < 400 and user is not None and user.is_authenticated:
+            record_write(user.id)
+        return response
+
+
+class ProfilerMiddleware:
+    """
+    Profiles requests from staff users that send ``X-Profile: 1`` and a
+    PROFILER_SAMPLE_RATE fraction of all others (see api.profiling). Reports
+    are listed in the admin under Request profiles.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        decision = profiling.profile_reason(request)
+        if decision is None:
+            return self.get_response(request)
+        reason, user = decision
+        return profiling.profile(request, self.get_response, reason, user)
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:04
+
+import re
+
+from django.db import migrations, models
+
+# Frozen copy of api.ai.intent.OFFER_TERMS / offers_news() as of this
+# migration, so later changes to the classifier do not change its result.
+OFFER_TERMS = [
+    r"headlines?", r"news", r"fetch", r"pull", r"stor(?:y|ies)",
+]
+_OFFER_RE = re.compile(r"\b(?:{})\b".format("|".join(OFFER_TERMS)), re.IGNORECASE)
+
+
+def offers_news(assistant_message):
+    return bool(assistant_message) and _OFFER_RE.search(assistant_message) is not None
+
+
+def backfill_offers_news(apps, schema_editor):
+    ChatMessage = apps.get_model('api', 'ChatMessage')
+    batch = []
+    for message in ChatMessage.objects.filter(role='assistant').only('id', 'content').iterator(chunk_size=2000):
+        if offers_news(message.content):
+            message.offers_news = True
+            batch.append(message)
+        if len(batch) >= 2000:
+            ChatMessage.objects.bulk_update(batch, ['offers_news'])
+            batch = []
+    if batch:
+        ChatMessage.objects.bulk_update(batch, ['offers_news'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_delete_chat_delete_course_delete_message_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='offers_news',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(backfill_offers_news, migrations.RunPython.noop),
+    ]
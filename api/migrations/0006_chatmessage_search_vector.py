@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 07:09
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+CREATE_TRIGGER = """
+CREATE TRIGGER api_chatmessage_search_vector_update
+BEFORE INSERT OR UPDATE OF content ON api_chatmessage
+FOR EACH ROW EXECUTE FUNCTION
+tsvector_update_trigger(search_vector, 'pg_catalog.english', content);
+"""
+
+DROP_TRIGGER = "DROP TRIGGER IF EXISTS api_chatmessage_search_vector_update ON api_chatmessage;"
+
+BACKFILL = "UPDATE api_chatmessage SET search_vector = to_tsvector('pg_catalog.english', content);"
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_chatjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatmessage',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.RunSQL(BACKFILL, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='chatmessage',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='api_chatmessage_search_gin'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_conversation_title_trgm'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatjob',
+            name='user_message_id',
+            field=models.BigIntegerField(blank=True, null=True),
+        ),
+    ]
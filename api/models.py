@@ -1,7 +1,21 @@
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User
 
 
+class LiveConversationManager(models.Manager):
+    """Hides soft-deleted conversations; use Conversation.all_objects to see them"""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Conversation(models.Model):
     """
     A conversation belongs to a user and stores chat history.
@@ -10,14 +24,48 @@ class Conversation(models.Model):
     title = models.CharField(max_length=255, default="New Chat")
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Messages live in a ConversationArchive blob until the conversation is opened again
+    is_archived = models.BooleanField(default=False)
+    # Set on delete; api.deletion.reap removes the rows in the background
+    deleted_at = models.DateTimeField(null=True, blank=True, db_index=True)
+
+    objects = LiveConversationManager()
+    all_objects = models.Manager()
 
     class Meta:
         ordering = ["-updated_at"]
+        # Related lookups (message.conversation) must still reach deleted rows
+        base_manager_name = "all_objects"
+        indexes = [
+            # Serves title__icontains (UPPER(title) LIKE ...) in the admin search
+            GinIndex(OpClass(Upper("title"), name="gin_trgm_ops"), name="api_conversation_title_trgm"),
+        ]
 
     def __str__(self):
         return f"{self.user.username} - {self.title}"
 
 
+class ChatMessageQuerySet(models.QuerySet):
+    def in_conversation(self, conversation_id, since):
+        """
+        Messages of one conversation, for reads.
+
+        ``since`` is the conversation's created_at. Once the table is
+        partitioned by month (see api.partitions) it also bounds the read, so
+        older partitions are skipped; messages are stamped by the app
+        server's clock and can predate it slightly, so the bound is
+        CHAT_MESSAGE_CLOCK_MARGIN earlier. Archiving and deletion filter on
+        conversation_id alone.
+        """
+        from .partitions import messages_partitioned
+
+        messages = self.filter(conversation_id=conversation_id)
+        if not messages_partitioned():
+            return messages
+        margin = timedelta(seconds=settings.CHAT_MESSAGE_CLOCK_MARGIN)
+        return messages.filter(created_at__gte=since - margin)
+
+
 class ChatMessage(models.Model):
     """
     A message in a conversation.
@@ -31,10 +79,115 @@ class ChatMessage(models.Model):
     role = models.CharField(max_length=20, choices=ROLE_CHOICES)
     content = models.TextField()
     has_news_context = models.BooleanField(default=False)
+    # Cached intent of an assistant turn: does it offer to fetch news?
+    offers_news = models.BooleanField(default=False)
+    # Maintained by a database trigger from `content`, see migration 0006
+    search_vector = SearchVectorField(null=True, editable=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    objects = ChatMessageQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["created_at"]
+        indexes = [
+            GinIndex(fields=["search_vector"], name="api_chatmessage_search_gin"),
+        ]
+
+    def __str__(self):
+        return f"{self.conversation.title} - {self.role}: {self.content[:50]}"
+
+
+class ConversationArchive(models.Model):
+    """
+    Compressed cold copy of an idle conversation's messages.
+
+    Written by the archive_conversations command, which removes the rows from
+    ChatMessage; read back (and deleted) by api.archive.rehydrate when the
+    conversation is used again. The last message preview and count are kept
+    so the conversation list does not need to decompress anything.
+    """
+    conversation = models.OneToOneField(Conversation, on_delete=models.CASCADE, related_name="archive")
+    codec = models.CharField(max_length=10)
+    data = models.BinaryField()
+    message_count = models.PositiveIntegerField()
+    last_role = models.CharField(max_length=20, blank=True)
+    last_content = models.CharField(max_length=100, blank=True)
+    raw_bytes = models.PositiveBigIntegerField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Archive of {self.conversation_id} ({self.message_count} messages)"
+
+
+class ChatJob(models.Model):
+    """
+    A chat turn queued to run in the background.
+
+    ``fair_seq`` is the job's position in its owner's queue when it was
+    submitted; workers claim jobs ordered by it so every owner gets their
+    first job served before anyone gets a second. ``user_message_id`` is the
+    ChatMessage the first run saved, so a requeued job does not save it again.
+    """
+    STATUS_CHOICES = [
+        ("queued", "Queued"),
+        ("running", "Running"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name="chat_jobs")
+    owner_key = models.CharField(max_length=64)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="queued")
+    fair_seq = models.PositiveIntegerField(default=0)
+    payload = models.JSONField()
+    user_message_id = models.BigIntegerField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         ordering = ["created_at"]
+        indexes = [
+            models.Index(fields=["status", "fair_seq", "created_at"]),
+            models.Index(fields=["owner_key", "status"]),
+        ]
+
+    def __str__(self):
+        return f"{self.owner_key} - {self.status}"
+
+
+class RequestProfile(models.Model):
+    """
+    Profile of one request, recorded by ProfilerMiddleware for staff users
+    who ask for it (X-Profile: 1) or for a sampled fraction of traffic.
+    Size and count are capped, see PROFILER_* settings.
+    """
+    REASON_CHOICES = [
+        ("staff", "Staff request"),
+        ("sampled", "Sampled"),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    request_id = models.CharField(max_length=64, blank=True)
+    user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    reason = models.CharField(max_length=20, choices=REASON_CHOICES)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=255)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    query_count = models.PositiveIntegerField()
+    query_ms = models.FloatField()
+    # {"openai": {"calls": 1, "ms": 812.4}, "newsapi": {...}}
+    upstream = models.JSONField(default=dict)
+    # [{"sql": "...", "ms": 0.4}], truncated to PROFILER_MAX_QUERIES
+    queries = models.JSONField(default=list)
+    top_functions = models.TextField()
+
+    class Meta:
+        ordering = ["-created_at"]
 
     def __str__(self):
-        return f"{self.conversation.title} - {self.role}: {self.content[:50]}"
\ No newline at end of file
+        return f"{self.method} {self.path} ({self.duration_ms:.0f} ms)"
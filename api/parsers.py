@@ -0,0 +1,27 @@
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from . import renderers
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+
+class FastJSONParser(JSONParser):
+    """JSON parser using orjson, converting camelCase keys back to snake_case"""
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        raw = stream.read() if stream is not None else b''
+        try:
+            data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        except ValueError as exc:
+            raise ParseError(f"JSON parse error - {exc}")
+        if settings.API_CAMEL_CASE:
+            renderers.ensure_key_maps()
+            data = renderers.convert_keys(data, renderers.snake_key)
+        return data
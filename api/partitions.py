@@ -0,0 +1,252 @@
+"""
+Monthly range partitioning of ``api_chatmessage`` by ``created_at`` (PostgreSQL 13+).
+
+Partitioning is opt-in and done once with ``manage.py partition_messages
+--convert``; the Django model does not change. PostgreSQL requires the
+partition key in the primary key, so the converted table's key is
+``(id, created_at)``; ids still come from a single sequence and stay unique.
+
+Partitions are named ``api_chatmessage_pYYYY_MM`` and cover one UTC month.
+A default partition catches anything outside them, e.g. an archived
+conversation rehydrated into a month that has been dropped.
+"""
+from datetime import datetime, timezone
+
+from django.db import connection, transaction
+
+from .models import ChatMessage, Conversation
+
+TABLE = ChatMessage._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_pdefault"
+
+_TRIGGER = f"""
+CREATE TRIGGER api_chatmessage_search_vector_update
+BEFORE INSERT OR UPDATE OF content ON {TABLE}
+FOR EACH ROW EXECUTE FUNCTION
+tsvector_update_trigger(search_vector, 'pg_catalog.english', content)
+"""
+
+
+# Whether the table is partitioned, looked up once per process (see messages_partitioned)
+_partitioned = None
+
+
+class PartitionError(Exception):
+    pass
+
+
+def month_start(moment):
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def _quote(name):
+    return connection.ops.quote_name(name)
+
+
+def _check_vendor():
+    if connection.vendor != "postgresql":
+        raise PartitionError("Partitioning needs PostgreSQL")
+
+
+def is_partitioned(cursor):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = %s::regclass", [TABLE])
+    return cursor.fetchone()[0] == "p"
+
+
+def messages_partitioned():
+    """
+    Whether ``api_chatmessage`` is partitioned, cached for the process.
+
+    Conversion only goes one way, so a stale False merely skips partition
+    pruning until the process restarts.
+    """
+    global _partitioned
+    if _partitioned is None:
+        if connection.vendor != "postgresql":
+            _partitioned = False
+        else:
+            with connection.cursor() as cursor:
+                _partitioned = is_partitioned(cursor)
+    return _partitioned
+
+
+def partitions(cursor):
+    """``[(name, month or None for the default partition, estimated rows)]``, oldest first"""
+    cursor.execute(
+        """
+        SELECT child.relname, child.reltuples::bigint
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = %s::regclass
+        """,
+        [TABLE],
+    )
+    result = []
+    for name, rows in cursor.fetchall():
+        month = None
+        if name != DEFAULT_PARTITION:
+            month = datetime.strptime(name[-7:], "%Y_%m").replace(tzinfo=timezone.utc)
+        result.append((name, month, max(rows, 0)))
+    # The default partition sorts last
+    return sorted(result, key=lambda row: row[1] or datetime.max.replace(tzinfo=timezone.utc))
+
+
+def _create_partition(cursor, parent, month):
+    # DDL takes no bind parameters; the bounds are generated, not user input
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {_quote(partition_name(month))} PARTITION OF {_quote(parent)} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    )
+
+
+def _move_out_of_default(cursor, month):
+    """
+    Take ``month``'s rows out of the default partition, which PostgreSQL
+    requires before a partition for that month can be attached. Returns the
+    name of a temporary table holding them, to be inserted back afterwards.
+    """
+    cursor.execute(f"SELECT 1 FROM {_quote(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s LIMIT 1",
+                   [month, add_months(month, 1)])
+    if cursor.fetchone() is None:
+        return None
+    held = f"{partition_name(month)}_moving"
+    cursor.execute(f"CREATE TEMP TABLE {_quote(held)} (LIKE {_quote(TABLE)}) ON COMMIT DROP")
+    cursor.execute(
+        f"WITH moved AS (DELETE FROM {_quote(DEFAULT_PARTITION)} WHERE created_at >= %s AND created_at < %s "
+        f"RETURNING *) INSERT INTO {_quote(held)} SELECT * FROM moved",
+        [month, add_months(month, 1)],
+    )
+    return held
+
+
+def ensure_partitions(ahead=3, now=None):
+    """
+    Create partitions from the current month through ``ahead`` months ahead,
+    moving rows for those months out of the default partition. Returns names created.
+    """
+    _check_vendor()
+    current = month_start(now or datetime.now(timezone.utc))
+    created = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise PartitionError(f"{TABLE} is not partitioned; run with --convert first")
+        existing = {name for name, _, _ in partitions(cursor)}
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            if partition_name(month) not in existing:
+                held = _move_out_of_default(cursor, month) if DEFAULT_PARTITION in existing else None
+                _create_partition(cursor, TABLE, month)
+                if held:
+                    cursor.execute(f"INSERT INTO {_quote(TABLE)} SELECT * FROM {_quote(held)}")
+                created.append(partition_name(month))
+    return created
+
+
+def convert(ahead=3):
+    """
+    Rebuild ``api_chatmessage`` as a partitioned table, copying every row.
+
+    Runs in one transaction under an ACCESS EXCLUSIVE lock, so writes to
+    messages wait until it finishes; run it in a maintenance window.
+    Returns the number of rows copied.
+    """
+    global _partitioned
+    _check_vendor()
+    new_table = f"{TABLE}_partitioned"
+    sequence = f"{TABLE}_id_seq"
+    conversation_table = Conversation._meta.db_table
+    with transaction.atomic(), connection.cursor() as cursor:
+        if is_partitioned(cursor):
+            raise PartitionError(f"{TABLE} is already partitioned")
+
+        cursor.execute(f"LOCK TABLE {_quote(TABLE)} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(f"SELECT min(created_at), max(created_at) FROM {_quote(TABLE)}")
+        oldest, newest = cursor.fetchone()
+
+        # A plain sequence rather than an identity column works on every
+        # partitioned-table version we support.
+        cursor.execute(f"CREATE SEQUENCE {_quote(new_table + '_id_seq')}")
+        cursor.execute(
+            f"CREATE TABLE {_quote(new_table)} (LIKE {_quote(TABLE)} INCLUDING DEFAULTS INCLUDING STORAGE) "
+            f"PARTITION BY RANGE (created_at)"
+        )
+        cursor.execute(
+            f"ALTER TABLE {_quote(new_table)} ALTER COLUMN id "
+            f"SET DEFAULT nextval('{new_table}_id_seq'::regclass)"
+        )
+        cursor.execute(f"ALTER TABLE {_quote(new_table)} ADD PRIMARY KEY (id, created_at)")
+
+        now = datetime.now(timezone.utc)
+        month = month_start(oldest or now)
+        last = add_months(month_start(max(newest or now, now)), ahead)
+        while month <= last:
+            _create_partition(cursor, new_table, month)
+            month = add_months(month, 1)
+        cursor.execute(f"CREATE TABLE {_quote(DEFAULT_PARTITION)} PARTITION OF {_quote(new_table)} DEFAULT")
+
+        cursor.execute(f"INSERT INTO {_quote(new_table)} SELECT * FROM {_quote(TABLE)}")
+        copied = cursor.rowcount
+        cursor.execute(
+            f"SELECT setval(%s, COALESCE(max(id), 0) + 1, false) FROM {_quote(new_table)}",
+            [new_table + "_id_seq"],
+        )
+
+        # Dropping the old table also drops its trigger, indexes, foreign key
+        # and sequence, which frees their names for the new table.
+        cursor.execute(f"DROP TABLE {_quote(TABLE)}")
+        cursor.execute(f"ALTER TABLE {_quote(new_table)} RENAME TO {_quote(TABLE)}")
+        cursor.execute(f"ALTER SEQUENCE {_quote(new_table + '_id_seq')} RENAME TO {_quote(sequence)}")
+        cursor.execute(f"ALTER SEQUENCE {_quote(sequence)} OWNED BY {_quote(TABLE)}.id")
+        cursor.execute(f"ALTER TABLE {_quote(TABLE)} RENAME CONSTRAINT {_quote(new_table + '_pkey')} TO {_quote(TABLE + '_pkey')}")
+        cursor.execute(
+            f"ALTER TABLE {_quote(TABLE)} ADD CONSTRAINT {_quote(TABLE + '_conversation_id_fk')} "
+            f"FOREIGN KEY (conversation_id) REFERENCES {_quote(conversation_table)} (id) "
+            f"DEFERRABLE INITIALLY DEFERRED"
+        )
+        # Serves in_conversation(): one conversation, ordered by time
+        cursor.execute(
+            f"CREATE INDEX {_quote(TABLE + '_conversation_created')} ON {_quote(TABLE)} (conversation_id, created_at)"
+        )
+        cursor.execute(f"CREATE INDEX api_chatmessage_search_gin ON {_quote(TABLE)} USING gin (search_vector)")
+        cursor.execute(_TRIGGER)
+    _partitioned = True
+    return copied
+
+
+def detach_older_than(months, drop=False, force=False, now=None):
+    """
+    Detach (and with ``drop`` delete) monthly partitions more than ``months`` old.
+
+    Partitions that still hold rows are skipped unless ``force`` is set;
+    archive_conversations normally empties old months first. Returns
+    ``[(name, rows, action)]``.
+    """
+    _check_vendor()
+    cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -months)
+    results = []
+    with connection.cursor() as cursor:
+        if not is_partitioned(cursor):
+            raise PartitionError(f"{TABLE} is not partitioned")
+        for name, month, _ in partitions(cursor):
+            if month is None or month >= cutoff:
+                continue
+            with transaction.atomic():
+                cursor.execute(f"SELECT count(*) FROM {_quote(name)}")
+                rows = cursor.fetchone()[0]
+                if rows and not force:
+                    results.append((name, rows, "skipped"))
+                    continue
+                cursor.execute(f"ALTER TABLE {_quote(TABLE)} DETACH PARTITION {_quote(name)}")
+                if drop:
+                    cursor.execute(f"DROP TABLE {_quote(name)}")
+                results.append((name, rows, "dropped" if drop else "detached"))
+    return results
@@ -0,0 +1,188 @@
+"""
+On-demand request profiling, stored as RequestProfile rows.
+
+A request is profiled when a staff user sends ``X-Profile: 1`` or when it
+falls into PROFILER_SAMPLE_RATE. The profile combines cProfile's top
+functions for the request thread, every ORM query, and the time spent in
+upstream calls (OpenAI, NewsAPI), which ``upstream()`` collects from any
+thread that inherited the request context. Reports are capped in size, in
+number per minute and in total, and expire after PROFILER_RETENTION_DAYS.
+"""
+import cProfile
+import io
+import logging
+import pstats
+import random
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from shared.log import request_id_var
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_profile", default=None)
+
+_budget_lock = threading.Lock()
+# cProfile cannot run in two threads at once: on Python 3.12+ it is built on
+# the interpreter-wide sys.monitoring, so a second enable() raises and would
+# also mix other threads' calls into the report.
+_profiler_lock = threading.Lock()
+_budget = {"minute": None, "count": 0}
+
+
+class _Upstream:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.totals = {}
+
+    def add(self, kind, ms):
+        with self._lock:
+            entry = self.totals.setdefault(kind, {"calls": 0, "ms": 0.0})
+            entry["calls"] += 1
+            entry["ms"] = round(entry["ms"] + ms, 1)
+
+
+@contextmanager
+def upstream(kind):
+    """Time an upstream call into the current request's profile, if it has one"""
+    collector = _current.get()
+    if collector is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        collector.add(kind, (time.perf_counter() - started) * 1000)
+
+
+class _QueryRecorder:
+    """connection.execute_wrapper that keeps the first PROFILER_MAX_QUERIES queries"""
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - started) * 1000
+            self.count += 1
+            self.total_ms += ms
+            if len(self.queries) < settings.PROFILER_MAX_QUERIES:
+                self.queries.append({"sql": sql[:settings.PROFILER_MAX_SQL_CHARS], "ms": round(ms, 2)})
+
+
+def _take_budget():
+    """At most PROFILER_MAX_PER_MINUTE profiles per process and minute"""
+    minute = int(time.monotonic() // 60)
+    with _budget_lock:
+        if _budget["minute"] != minute:
+            _budget["minute"], _budget["count"] = minute, 0
+        if _budget["count"] >= settings.PROFILER_MAX_PER_MINUTE:
+            return False
+        _budget["count"] += 1
+        return True
+
+
+def _staff_user(request):
+    # The view authenticates later; this only reads the JWT claims
+    from .authentication import ClaimsJWTAuthentication
+
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except Exception:
+        return None
+    if result and result[0].is_staff:
+        return result[0]
+    return None
+
+
+def profile_reason(request):
+    """(reason, staff user or None) when ``request`` should be profiled, else None"""
+    if request.headers.get("X-Profile") == "1" and settings.PROFILER_ALLOW_STAFF:
+        user = _staff_user(request)
+        if user is not None:
+            return ("staff", user) if _take_budget() else None
+    if settings.PROFILER_SAMPLE_RATE and random.random() < settings.PROFILER_SAMPLE_RATE:
+        return ("sampled", None) if _take_budget() else None
+    return None
+
+
+def profile(request, get_response, reason, user=None):
+    """Run ``get_response`` under the profiler; unprofiled if another profile is running"""
+    if not _profiler_lock.acquire(blocking=False):
+        return get_response(request)
+    try:
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiling tool (a debugger, coverage) holds sys.monitoring
+            return get_response(request)
+        collector = _Upstream()
+        recorder = _QueryRecorder()
+        token = _current.set(collector)
+        started = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(recorder))
+                response = get_response(request)
+        finally:
+            profiler.disable()
+            _current.reset(token)
+    finally:
+        _profiler_lock.release()
+    duration_ms = (time.perf_counter() - started) * 1000
+
+    try:
+        _save(request, response, reason, user, duration_ms, recorder, collector, profiler)
+    except Exception:
+        logger.exception("Could not store request profile")
+    return response
+
+
+def _save(request, response, reason, user, duration_ms, recorder, collector, profiler):
+    from .models import RequestProfile
+
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(settings.PROFILER_TOP_FUNCTIONS)
+    RequestProfile.objects.create(
+        request_id=request_id_var.get() or "",
+        user_id=user.id if user is not None else None,
+        reason=reason,
+        method=request.method,
+        path=request.path[:255],
+        status_code=response.status_code,
+        duration_ms=round(duration_ms, 1),
+        query_count=recorder.count,
+        query_ms=round(recorder.total_ms, 1),
+        upstream=collector.totals,
+        queries=recorder.queries,
+        top_functions=output.getvalue()[:settings.PROFILER_MAX_REPORT_CHARS],
+    )
+    prune()
+
+
+def prune():
+    """Enforce PROFILER_RETENTION_DAYS and PROFILER_MAX_REPORTS"""
+    from .models import RequestProfile
+
+    cutoff = timezone.now() - timedelta(days=settings.PROFILER_RETENTION_DAYS)
+    RequestProfile.objects.filter(created_at__lt=cutoff).delete()
+    overflow = list(
+        RequestProfile.objects.order_by("-id").values_list("id", flat=True)[settings.PROFILER_MAX_REPORTS:][:1]
+    )
+    if overflow:
+        RequestProfile.objects.filter(id__lte=overflow[0]).delete()
@@ -0,0 +1,116 @@
+"""
+Serializer-free read path for conversation payloads.
+
+Builds the same dicts as ConversationSerializer / ConversationListSerializer
+straight from ``.values()`` rows, skipping model instantiation and DRF field
+machinery. Field names, order and formatting must stay identical to the
+serializers; ``api.tests.test_projections`` verifies that.
+"""
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Substr
+from rest_framework import serializers
+
+from .archive import ensure_hot
+from .models import ChatMessage, Conversation
+from .replicas import primary_reads, record_write
+
+# The serializers' own datetime formatting, so output is byte-identical
+_datetime = serializers.DateTimeField().to_representation
+
+CONVERSATION_FIELDS = ('id', 'title', 'created_at', 'updated_at')
+MESSAGE_FIELDS = ('id', 'role', 'content', 'has_news_context', 'created_at')
+
+
+def messages_payload(conversation_id, since):
+    return [
+        {
+            'id': message_id,
+            'role': role,
+            'content': content,
+            'has_news_context': has_news_context,
+            'created_at': _datetime(created_at),
+        }
+        for message_id, role, content, has_news_context, created_at in (
+            ChatMessage.objects
+            .in_conversation(conversation_id, since)
+            .order_by('created_at')
+            .values_list(*MESSAGE_FIELDS)
+        )
+    ]
+
+
+def conversation_payload(conversation):
+    """ConversationSerializer(conversation).data, for an instance or a values() dict"""
+    if isinstance(conversation, Conversation):
+        row = {field: getattr(conversation, field) for field in CONVERSATION_FIELDS}
+    else:
+        row = conversation
+    return {
+        'id': row['id'],
+        'title': row['title'],
+        'created_at': _datetime(row['created_at']),
+        'updated_at': _datetime(row['updated_at']),
+        'messages': messages_payload(row['id'], row['created_at']),
+    }
+
+
+def get_conversation_payload(user_id, conversation_id):
+    """
+    Payload for one of the user's conversations, or None when it does not exist.
+
+    Archived conversations are rehydrated first, which writes to the primary
+    even though this serves a GET, and are then read from the primary: a
+    replica may not have the restored messages yet.
+    """
+    row = (
+        Conversation.objects
+        .filter(id=conversation_id, user_id=user_id)
+        .values(*CONVERSATION_FIELDS, 'is_archived')
+        .first()
+    )
+    if row is None:
+        return None
+    if not row['is_archived']:
+        return conversation_payload(row)
+    ensure_hot(row)
+    record_write(user_id)
+    with primary_reads():
+        return conversation_payload(row)
+
+
+def conversation_list_payload(user_id):
+    """ConversationListSerializer(many=True).data for the user, in a single query"""
+    messages = ChatMessage.objects.in_conversation(OuterRef('pk'), OuterRef('created_at'))
+    count = messages.order_by().values('conversation_id').annotate(count=Count('id')).values('count')
+    last_message = messages.order_by('-created_at', '-id')
+    # Correlated subqueries instead of Count('messages') keep the query free of GROUP BY
+    rows = (
+        Conversation.objects
+        .filter(user_id=user_id)
+        .annotate(
+            message_count=Coalesce(Subquery(count), 0),
+            last_role=Subquery(last_message.values('role')[:1]),
+            last_content=Subquery(last_message.annotate(short=Substr('content', 1, 100)).values('short')[:1]),
+        )
+        .values_list(
+            *CONVERSATION_FIELDS, 'message_count', 'last_role', 'last_content',
+            'is_archived', 'archive__message_count', 'archive__last_role', 'archive__last_content',
+        )
+    )
+    payload = []
+    for (conversation_id, title, created_at, updated_at, message_count, last_role, last_content,
+         is_archived, archived_count, archived_role, archived_content) in rows:
+        if is_archived and archived_count is not None:
+            # Archived messages are not in the hot table; use the stored preview
+            message_count += archived_count
+            if last_role is None:
+                last_role, last_content = archived_role, archived_content
+        payload.append({
+            'id': conversation_id,
+            'title': title,
+            'created_at': _datetime(created_at),
+            'updated_at': _datetime(updated_at),
+            'message_count': message_count,
+            'last_message': {'role': last_role, 'content': last_content} if last_role is not None else None,
+        })
+    return payload
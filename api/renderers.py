@@ -0,0 +1,122 @@
+import json
+
+from django.conf import settings
+from djangorestframework_camel_case.util import camel_to_underscore, camelize_re, underscore_to_camel
+from rest_framework.utils.encoders import JSONEncoder
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - stdlib fallback
+    orjson = None
+
+# Cap on memoized key conversions so client-controlled keys cannot grow the maps forever
+MAX_CACHED_KEYS = 10000
+
+_to_camel = {}
+_to_snake = {}
+_encoder = JSONEncoder()
+
+
+def _precompute_keys():
+    """Seed the key maps with every field name our serializers and views emit"""
+    from . import serializers
+
+    names = {
+        'conversation_id', 'has_news_context', 'session_token', 'next_cursor', 'message_id',
+        'conversation_title', 'job_id', 'started_at', 'finished_at', 'latency_ms',
+        'prompt_tokens', 'completion_tokens', 'total_tokens', 'offers_news',
+    }
+    for serializer_class in (
+        serializers.UserSerializer,
+        serializers.ChatMessageSerializer,
+        serializers.ConversationListSerializer,
+        serializers.ConversationSerializer,
+    ):
+        names.update(serializer_class.Meta.fields)
+    for name in names:
+        camel = camelize_re.sub(underscore_to_camel, name)
+        _to_camel[name] = camel
+        _to_snake[camel] = name
+
+
+def ensure_key_maps():
+    if not _to_camel:
+        _precompute_keys()
+
+
+def camel_key(key):
+    try:
+        return _to_camel[key]
+    except KeyError:
+        if not isinstance(key, str) or '_' not in key:
+            return key
+        camel = camelize_re.sub(underscore_to_camel, key)
+        if len(_to_camel) < MAX_CACHED_KEYS:
+            _to_camel[key] = camel
+        return camel
+
+
+def snake_key(key):
+    try:
+        return _to_snake[key]
+    except KeyError:
+        if not isinstance(key, str):
+            return key
+        snake = camel_to_underscore(key)
+        if len(_to_snake) < MAX_CACHED_KEYS:
+            _to_snake[key] = snake
+        return snake
+
+
+_LINE_SEPARATOR = '\u2028'.encode('utf-8')
+_PARAGRAPH_SEPARATOR = '\u2029'.encode('utf-8')
+
+_SCALARS = frozenset((str, int, float, bool, type(None)))
+
+
+def convert_keys(data, convert):
+    """Rebuild ``data`` with every dict key passed through ``convert``"""
+    if isinstance(data, dict):
+        return {
+            convert(key): value if type(value) in _SCALARS else convert_keys(value, convert)
+            for key, value in data.items()
+        }
+    if isinstance(data, (list, tuple)):
+        return [item if type(item) in _SCALARS else convert_keys(item, convert) for item in data]
+    return data
+
+
+def _default(obj):
+    # Same representations as DRF's encoder (e.g. datetimes end in "Z")
+    return _encoder.default(obj)
+
+
+def dumps(data):
+    if orjson is not None:
+        content = orjson.dumps(data, default=_default, option=orjson.OPT_PASSTHROUGH_DATETIME)
+    else:
+        content = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    # Escaped like DRF's JSONRenderer does: both are line breaks in JavaScript
+    return content.replace(_LINE_SEPARATOR, b'\\u2028').replace(_PARAGRAPH_SEPARATOR, b'\\u2029')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON renderer using orjson, with optional snake_case -> camelCase keys.
+
+    Key conversion happens in one walk over the data using precomputed key
+    maps; encoding then happens in C. Output matches DRF's compact JSON.
+    Indented output (``Accept: application/json; indent=4``) goes through
+    the stock renderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if settings.API_CAMEL_CASE:
+            ensure_key_maps()
+            data = convert_keys(data, camel_key)
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -0,0 +1,88 @@
+"""
+Read-replica routing.
+
+Reads go to a replica only while ``replica_reads`` is active, which
+ReplicaMiddleware turns on for safe (GET/HEAD/OPTIONS) requests. Writes,
+unsafe requests, transactions, background workers and management commands
+all stay on ``default``.
+
+Read-your-writes: a successful unsafe request (or a finished chat job)
+pins its user to the primary for DB_REPLICA_PIN_SECONDS, checked when the
+request is authenticated. The pins live in the default cache, which must be
+shared between worker processes: the api.E001 system check refuses real
+replicas with a process-local cache.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+_replica_reads = ContextVar("replica_reads", default=False)
+
+# Rows that must be read back exactly as just written: the job queue and
+# the token blacklist.
+PRIMARY_ONLY = {
+    ("api", "chatjob"),
+    ("token_blacklist", "outstandingtoken"),
+    ("token_blacklist", "blacklistedtoken"),
+}
+
+
+def _pin_key(user_id):
+    return f"db-pin:{user_id}"
+
+
+def record_write(user_id):
+    """Pin ``user_id``'s reads to the primary for the replica lag window"""
+    if settings.DATABASE_REPLICAS and user_id is not None:
+        cache.set(_pin_key(user_id), True, settings.DB_REPLICA_PIN_SECONDS)
+
+
+def pin_if_recent_write(user_id):
+    """Called once the request user is known; drops replica reads for pinned users"""
+    if _replica_reads.get() and cache.get(_pin_key(user_id)):
+        _replica_reads.set(False)
+
+
+@contextmanager
+def replica_reads():
+    token = _replica_reads.set(bool(settings.DATABASE_REPLICAS))
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside this block, e.g. right after a write"""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if (
+            not _replica_reads.get()
+            or (model._meta.app_label, model._meta.model_name) in PRIMARY_ONLY
+            # Reads inside a transaction must see its own writes (and locks)
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
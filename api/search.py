@@ -0,0 +1,83 @@
+import base64
+import json
+
+from django.contrib.postgres.search import SearchHeadline, SearchQuery, SearchRank
+from django.db.models import F, FloatField, Q
+from django.db.models.functions import Cast
+
+from .models import ChatMessage
+
+SEARCH_CONFIG = "english"
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 50
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(rank, message_id):
+    return base64.urlsafe_b64encode(json.dumps([rank, message_id]).encode()).decode()
+
+
+def decode_cursor(cursor):
+    try:
+        rank, message_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(rank), int(message_id)
+    except (ValueError, TypeError):
+        raise InvalidCursor("Invalid cursor")
+
+
+def search_messages(user, text, limit=DEFAULT_LIMIT, cursor=None):
+    """
+    Full-text search over the user's messages, best matches first.
+
+    Uses the trigger-maintained ``search_vector`` column and its GIN index.
+    Messages of archived conversations are not in the hot table and are not
+    found until the conversation is opened again (see api.archive).
+    Pages are keyset-paginated on ``(rank, id)``; pass the returned
+    ``next_cursor`` back to get the following page.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+    query = SearchQuery(text, search_type="websearch", config=SEARCH_CONFIG)
+
+    # Rank is cast to double precision so cursor values compare exactly
+    messages = (
+        ChatMessage.objects
+        .filter(conversation__user_id=user.id, conversation__deleted_at__isnull=True, search_vector=query)
+        .annotate(rank=Cast(SearchRank(F("search_vector"), query), FloatField()))
+    )
+    if cursor:
+        rank, message_id = decode_cursor(cursor)
+        messages = messages.filter(Q(rank__lt=rank) | Q(rank=rank, id__lt=message_id))
+
+    page = list(
+        messages
+        .annotate(snippet=SearchHeadline(
+            "content", query, config=SEARCH_CONFIG,
+            start_sel="<mark>", stop_sel="</mark>", max_words=35, min_words=15,
+        ))
+        .order_by("-rank", "-id")
+        .values("id", "conversation_id", "conversation__title", "role", "created_at", "rank", "snippet")[:limit + 1]
+    )
+
+    next_cursor = None
+    if len(page) > limit:
+        page = page[:limit]
+        next_cursor = encode_cursor(page[-1]["rank"], page[-1]["id"])
+
+    return {
+        "results": [
+            {
+                "message_id": row["id"],
+                "conversation_id": row["conversation_id"],
+                "conversation_title": row["conversation__title"],
+                "role": row["role"],
+                "created_at": row["created_at"],
+                "rank": row["rank"],
+                "snippet": row["snippet"],
+            }
+            for row in page
+        ],
+        "next_cursor": next_cursor,
+    }
@@ -1,7 +1,30 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
 from django.contrib.auth.models import User
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .authentication import CachedRefreshToken, add_user_claims
 from .models import Conversation, ChatMessage
 
+# Chat request: only the message needs more than a presence check
+class ChatRequestSerializer(serializers.Serializer):
+    def get_fields(self):
+        # Built per instance so CHAT_MESSAGE_MAX_CHARS is read at request time
+        return {
+            'message': serializers.CharField(
+                max_length=settings.CHAT_MESSAGE_MAX_CHARS,
+                trim_whitespace=False,
+                error_messages={
+                    'required': 'Message is required',
+                    'blank': 'Message is required',
+                    'null': 'Message is required',
+                    'max_length': 'Message is limited to {max_length} characters',
+                },
+            ),
+        }
+
+
 # User serializer
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
@@ -9,6 +32,39 @@ class UserSerializer(serializers.ModelSerializer):
         fields = ['id', 'username', 'email']
 
 
+# Login serializer: embeds the user claims read by ClaimsJWTAuthentication
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_user_claims(super().get_token(user), user)
+
+
+# Refresh serializer: blacklist checks go through the cache, and the user
+# claims are re-read from the database so staff changes apply on refresh
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user = User.objects.filter(
+            **{api_settings.USER_ID_FIELD: refresh.payload.get(api_settings.USER_ID_CLAIM)}
+        ).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        add_user_claims(refresh, user)
+
+        data = {"access": str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
+
+
 # Conversation serializers
 class ChatMessageSerializer(serializers.ModelSerializer):
     class Meta:
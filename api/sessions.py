@@ -0,0 +1,108 @@
+import json
+import secrets
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+def new_token():
+    """Session tokens are only ever generated here, never taken from the client"""
+    return secrets.token_urlsafe(24)
+
+
+def _trim(history):
+    """Drop the oldest messages until the history fits the size caps"""
+    history = history[-settings.ANON_HISTORY_MAX_MESSAGES:]
+    encoded = json.dumps(history, separators=(',', ':')).encode('utf-8')
+    while history and len(encoded) > settings.ANON_HISTORY_MAX_BYTES:
+        history = history[1:]
+        encoded = json.dumps(history, separators=(',', ':')).encode('utf-8')
+    return encoded
+
+
+def _pack(history):
+    return zlib.compress(_trim(history))
+
+
+def _unpack(blob):
+    return json.loads(zlib.decompress(blob))
+
+
+class LocalHistoryStore:
+    """
+    In-process store with TTL expiry and LRU eviction. Every worker process
+    has its own; use CacheHistoryStore when several processes serve chats.
+    """
+
+    def __init__(self, ttl, max_sessions):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, token):
+        """The session's history, or None for a token this store does not hold"""
+        with self._lock:
+            entry = self._data.get(token)
+            if entry is None:
+                return None
+            expires, blob = entry
+            if expires < time.monotonic():
+                del self._data[token]
+                return None
+            self._data.move_to_end(token)
+        return _unpack(blob)
+
+    def save(self, token, history):
+        blob = _pack(history)
+        with self._lock:
+            self._data[token] = (time.monotonic() + self.ttl, blob)
+            self._data.move_to_end(token)
+            while len(self._data) > self.max_sessions:
+                self._data.popitem(last=False)
+
+    def delete(self, token):
+        with self._lock:
+            self._data.pop(token, None)
+
+
+class CacheHistoryStore:
+    """Store backed by a Django cache alias, shared between workers"""
+
+    def __init__(self, alias, ttl):
+        from django.core.cache import caches
+
+        self.cache = caches[alias]
+        self.ttl = ttl
+
+    def _key(self, token):
+        return f"chat-session:{token}"
+
+    def load(self, token):
+        blob = self.cache.get(self._key(token))
+        return _unpack(blob) if blob else None
+
+    def save(self, token, history):
+        self.cache.set(self._key(token), _pack(history), self.ttl)
+
+    def delete(self, token):
+        self.cache.delete(self._key(token))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_history_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if settings.ANON_HISTORY_BACKEND == 'cache':
+                    _store = CacheHistoryStore(settings.ANON_HISTORY_CACHE_ALIAS, settings.ANON_HISTORY_TTL)
+                else:
+                    _store = LocalHistoryStore(settings.ANON_HISTORY_TTL, settings.ANON_HISTORY_MAX_SESSIONS)
+    return _store
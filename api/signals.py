@@ -0,0 +1,27 @@
+from django.contrib.auth.models import User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import dbstats
+from .authentication import forget_blacklisted, forget_user_active, remember_blacklisted
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def cache_blacklisted_token(sender, instance, **kwargs):
+    remember_blacklisted(instance.token.jti, instance.token.expires_at)
+
+
+@receiver(post_delete, sender=BlacklistedToken)
+def uncache_blacklisted_token(sender, instance, **kwargs):
+    forget_blacklisted(instance.token.jti)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def uncache_user_active(sender, instance, **kwargs):
+    forget_user_active(instance.id)
+
+
+connection_created.connect(dbstats.connection_opened, dispatch_uid="api.dbstats.connection_opened")
@@ -0,0 +1,66 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from api.authentication import CachedRefreshToken, _active_key, _blacklist_key, tokens_for
+
+
+class BlacklistCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bob", password="pw")
+
+    @override_settings(JWT_BLACKLIST_NEGATIVE_TTL=30)
+    def test_not_blacklisted_is_not_cached_per_process(self):
+        # Another worker's logout would not reach this process's cache
+        refresh = CachedRefreshToken(str(tokens_for(self.user)))
+        refresh.check_blacklist()
+        self.assertIsNone(cache.get(_blacklist_key(refresh.payload[api_settings.JTI_CLAIM])))
+
+    @override_settings(JWT_BLACKLIST_NEGATIVE_TTL=30)
+    def test_rotated_out_token_cannot_refresh(self):
+        refresh = str(tokens_for(self.user))
+        self.assertEqual(self.client.post("/api/auth/refresh/", {"refresh": refresh}).status_code, 200)
+        # As seen by a worker that did not blacklist it: nothing cached
+        cache.clear()
+        self.assertEqual(self.client.post("/api/auth/refresh/", {"refresh": refresh}).status_code, 401)
+
+
+class RefreshClaimsTests(TestCase):
+    def test_refresh_picks_up_staff_changes(self):
+        user = User.objects.create_user(username="alice", password="pw")
+        refresh = str(tokens_for(user))
+        User.objects.filter(id=user.id).update(is_staff=True)
+
+        response = self.client.post("/api/auth/refresh/", {"refresh": refresh})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(AccessToken(response.json()["access"])["is_staff"])
+        self.assertTrue(RefreshToken(response.json()["refresh"])["is_staff"])
+
+        # Demotion applies the same way
+        User.objects.filter(id=user.id).update(is_staff=False)
+        response = self.client.post("/api/auth/refresh/", {"refresh": response.json()["refresh"]})
+        self.assertFalse(AccessToken(response.json()["access"])["is_staff"])
+
+
+class ClaimsRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="carol", password="pw")
+        access = str(tokens_for(self.user).access_token)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {access}"
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 200)
+        self.assertTrue(cache.get(_active_key(self.user.id)))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/auth/me/").status_code, 401)
+
+    def test_deleted_user_cannot_chat(self):
+        self.user.delete()
+        response = self.client.post("/api/chat/", {"message": "hello"}, content_type="application/json")
+        self.assertEqual(response.status_code, 401)
@@ -0,0 +1,167 @@
+"""
+Query and latency budgets for every route in api/urls.py.
+
+Each route is called against seeded data in the test database, offline
+(fake OpenAI and NewsAPI), and must stay within both the query count and
+the latency in api/perf_budgets.json, which is recorded on PostgreSQL like
+the rest of the suite runs. Re-record with::
+
+    PERF_BUDGETS_WRITE=1 python manage.py test api.tests.test_budgets
+"""
+import json
+import os
+import statistics
+import time
+from contextlib import ExitStack
+from datetime import timedelta
+from pathlib import Path
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import connections
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from api import containers
+from api.ai.fakes import fake_assistant
+from api.authentication import tokens_for
+from api.models import ChatJob, ChatMessage, Conversation
+from api.partitions import messages_partitioned
+from api.urls import urlpatterns
+
+BUDGETS_PATH = Path(__file__).resolve().parents[1] / "perf_budgets.json"
+PASSWORD = "budget-check-password"
+CONVERSATIONS = 100
+MESSAGES = 200
+REPEAT = 3
+HEADROOM = 3.0
+
+
+@override_settings(
+    # A private cache, cleared before every call, so results are cold-cache
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "budgets"}},
+    CHAT_JOB_BACKEND="db",
+    CONVERSATION_REAPER_BACKEND="command",
+)
+class RouteBudgetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        # Cached per process; looked up here so it is not charged to a route
+        messages_partitioned()
+        User = get_user_model()
+        cls.owner = User.objects.create_user(username="budget-owner", password=PASSWORD)
+        cls.staff = User.objects.create_user(username="budget-staff", password=PASSWORD, is_staff=True)
+        created = Conversation.objects.bulk_create(
+            [Conversation(user=cls.owner, title=f"Conversation {i}") for i in range(CONVERSATIONS)]
+        )
+        for conversation in created:
+            ChatMessage.objects.bulk_create(
+                [
+                    ChatMessage(
+                        conversation=conversation,
+                        role="user" if i % 2 == 0 else "assistant",
+                        content=f"Message {i} about technology and climate policy " + "lorem ipsum " * (i % 40),
+                        has_news_context=i % 7 == 0,
+                    )
+                    for i in range(MESSAGES)
+                ],
+                batch_size=1000,
+            )
+        Conversation.objects.filter(user=cls.owner).update(created_at=timezone.now() - timedelta(days=1))
+        cls.conversation = created[0]
+
+    def setUp(self):
+        original = containers._assistant
+        containers._assistant = fake_assistant()
+        self.addCleanup(setattr, containers, "_assistant", original)
+
+    def test_routes_within_budget(self):
+        budgets = json.loads(BUDGETS_PATH.read_text()) if BUDGETS_PATH.exists() else {}
+        cases = self._cases()
+        results = {}
+
+        for pattern in urlpatterns:
+            name = pattern.name
+            with self.subTest(route=name):
+                self.assertIn(name, cases, "no case defined in test_budgets")
+                queries, elapsed_ms = results[name] = self._measure(cases[name])
+                if os.environ.get("PERF_BUDGETS_WRITE"):
+                    continue
+                self.assertIn(name, budgets, "no budget recorded (run with PERF_BUDGETS_WRITE=1)")
+                self.assertLessEqual(queries, budgets[name]["queries"], "queries over budget")
+                self.assertLessEqual(elapsed_ms, budgets[name]["ms"], "ms over budget")
+
+        if os.environ.get("PERF_BUDGETS_WRITE"):
+            BUDGETS_PATH.write_text(json.dumps({
+                name: {"queries": queries, "ms": max(50, round(elapsed_ms * HEADROOM))}
+                for name, (queries, elapsed_ms) in results.items()
+            }, indent=2) + "\n")
+
+    def _cases(self):
+        """Route name -> prepare(i) returning (method, path, body, user, expected status)"""
+        owner, staff, conversation = self.owner, self.staff, self.conversation
+
+        def spare_conversations(count):
+            return [Conversation.objects.create(user=owner, title="Spare") for _ in range(count)]
+
+        def job():
+            return ChatJob.objects.create(user=owner, owner_key=f"user:{owner.id}", payload={"message": "hi"})
+
+        return {
+            "register": lambda i: ("post", reverse("register"), {
+                "username": f"budget-new-{i}", "password": PASSWORD,
+            }, None, 201),
+            "token_obtain_pair": lambda i: ("post", reverse("token_obtain_pair"), {
+                "username": owner.username, "password": PASSWORD,
+            }, None, 200),
+            "token_refresh": lambda i: ("post", reverse("token_refresh"), {
+                "refresh": str(tokens_for(owner)),
+            }, None, 200),
+            "logout": lambda i: ("post", reverse("logout"), {"refresh": str(tokens_for(owner))}, owner, 200),
+            "current_user": lambda i: ("get", reverse("current_user"), None, owner, 200),
+            "list_conversations": lambda i: ("get", reverse("list_conversations"), None, owner, 200),
+            "create_conversation": lambda i: ("post", reverse("create_conversation"), {"title": "New"}, owner, 201),
+            "get_conversation": lambda i: (
+                "get", reverse("get_conversation", args=[conversation.id]), None, owner, 200),
+            "update_conversation": lambda i: (
+                "patch", reverse("update_conversation", args=[conversation.id]), {"title": f"Renamed {i}"}, owner, 200),
+            "delete_conversation": lambda i: (
+                "delete", reverse("delete_conversation", args=[spare_conversations(1)[0].id]), None, owner, 200),
+            "bulk_delete_conversations": lambda i: ("post", reverse("bulk_delete_conversations"), {
+                "ids": [c.id for c in spare_conversations(5)],
+            }, owner, 200),
+            "export_conversations": lambda i: ("get", reverse("export_conversations"), None, owner, 200),
+            "search_messages": lambda i: ("get", reverse("search_messages") + "?q=climate+policy", None, owner, 200),
+            "chat": lambda i: ("post", reverse("chat"), {
+                "message": "What's the latest technology news?", "conversation_id": conversation.id,
+            }, owner, 200),
+            "chat_batch": lambda i: ("post", reverse("chat_batch"), {
+                "items": [{"id": n, "message": f"Question {n}"} for n in range(4)],
+            }, staff, 200),
+            "get_chat_job": lambda i: ("get", reverse("get_chat_job", args=[job().id]), None, owner, 200),
+            "reset_conversation": lambda i: ("post", reverse("reset_conversation"), {"session_token": "x"}, None, 200),
+            "metrics": lambda i: ("get", reverse("metrics"), None, staff, 200),
+        }
+
+    def _measure(self, prepare):
+        """(max query count, median ms) over REPEAT calls"""
+        query_counts = []
+        timings = []
+        for i in range(REPEAT):
+            method, path, body, user, expected = prepare(i)
+            client = Client(raise_request_exception=False)
+            headers = {"HTTP_AUTHORIZATION": f"Bearer {tokens_for(user).access_token}"} if user else {}
+            caches["default"].clear()
+            with ExitStack() as stack:
+                captured = [stack.enter_context(CaptureQueriesContext(connections[alias])) for alias in connections]
+                started = time.perf_counter()
+                kwargs = {"data": json.dumps(body), "content_type": "application/json"} if body is not None else {}
+                response = getattr(client, method)(path, **kwargs, **headers)
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                timings.append((time.perf_counter() - started) * 1000)
+            self.assertEqual(response.status_code, expected, f"{method.upper()} {path}")
+            query_counts.append(sum(len(context) for context in captured))
+        return max(query_counts), statistics.median(timings)
@@ -0,0 +1,71 @@
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from api import containers
+from api.ai.fakes import fake_assistant
+from api.authentication import tokens_for
+from api.batch import BatchError, parse_jsonl
+from api.sessions import get_history_store
+
+
+@override_settings(CHAT_MESSAGE_MAX_CHARS=10)
+class ChatMessageLimitTests(TestCase):
+    def test_chat_rejects_long_message(self):
+        response = self.client.post(reverse("chat"), {"message": "x" * 11}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Message is limited to 10 characters"})
+
+    def test_chat_requires_message(self):
+        response = self.client.post(reverse("chat"), {"message": ""}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Message is required"})
+
+    def test_batch_rejects_long_message(self):
+        with self.assertRaisesMessage(BatchError, "Line 2: 'message' is limited to 10 characters"):
+            parse_jsonl(['{"message": "short"}', '{"message": "much too long"}'])
+
+
+class ChatBatchValidationTests(TestCase):
+    def setUp(self):
+        staff = User.objects.create_user(username="staff", password="pw", is_staff=True)
+        self.client.defaults["HTTP_AUTHORIZATION"] = f"Bearer {tokens_for(staff).access_token}"
+
+    def test_parse_rejects_non_string_message(self):
+        with self.assertRaisesMessage(BatchError, "Line 1: 'message' must be a string"):
+            parse_jsonl(['{"message": 5}'])
+        with self.assertRaisesMessage(BatchError, "Line 1: 'history' must be a list"):
+            parse_jsonl(['{"message": "hi", "history": "nope"}'])
+
+    def test_batch_rejects_malformed_json_bodies(self):
+        for body in ([{"message": "hi"}], {"items": {"message": "hi"}}, {"items": [{"message": 5}]}):
+            response = self.client.post(reverse("chat_batch"), body, content_type="application/json")
+            self.assertEqual(response.status_code, 400, body)
+            self.assertIn("error", response.json())
+
+
+class AnonymousSessionTests(TestCase):
+    def setUp(self):
+        original = containers._assistant
+        containers._assistant = fake_assistant()
+        self.addCleanup(setattr, containers, "_assistant", original)
+
+    def _chat(self, **body):
+        response = self.client.post(reverse("chat"), {"message": "hello", **body}, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_client_chosen_token_is_replaced(self):
+        data = self._chat(session_token="chosen-by-the-client")
+
+        self.assertNotEqual(data["session_token"], "chosen-by-the-client")
+        self.assertIsNone(get_history_store().load("chosen-by-the-client"))
+
+    def test_issued_token_resumes_its_history(self):
+        first = self._chat()
+        second = self._chat(session_token=first["session_token"])
+
+        self.assertEqual(second["session_token"], first["session_token"])
+        self.assertGreater(len(second["history"]), len(first["history"]))
@@ -0,0 +1,83 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from api import jobs
+from api.models import ChatJob, ChatMessage, Conversation
+
+
+def old_job(user, status):
+    job = ChatJob.objects.create(user=user, owner_key=f"user:{user.id}", payload={"message": "hi"}, status=status)
+    long_ago = timezone.now() - timedelta(hours=1)
+    ChatJob.objects.filter(id=job.id).update(
+        created_at=long_ago, started_at=long_ago if status == "running" else None
+    )
+    return job
+
+
+@override_settings(CHAT_JOB_BACKEND="db", CHAT_JOB_MAX_PER_USER=1, CHAT_JOB_STALE_AFTER=600)
+class ChatJobQueueTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="pw")
+        self.request = RequestFactory().post("/api/chat/")
+        self.request.user = self.user
+
+    def test_stale_jobs_do_not_count_toward_quota(self):
+        old_job(self.user, "running")
+        jobs.enqueue(self.request, {"message": "hello"})
+        with self.assertRaises(jobs.QueueFull):
+            jobs.enqueue(self.request, {"message": "again"})
+
+    def test_long_queued_jobs_count_toward_quota(self):
+        old_job(self.user, "queued")
+        with self.assertRaises(jobs.QueueFull):
+            jobs.enqueue(self.request, {"message": "hello"})
+
+    def test_start_poller_starts_one_thread_without_queries(self):
+        with mock.patch.object(jobs, "_poller", None), mock.patch("threading.Thread") as thread, \
+                self.assertNumQueries(0):
+            jobs.start_poller()
+            jobs.start_poller()
+        thread.assert_called_once()
+
+    def test_requeued_job_does_not_save_the_user_message_twice(self):
+        job = ChatJob.objects.create(user=self.user, owner_key=f"user:{self.user.id}",
+                                     payload={"message": "hello"}, status="running")
+        assistant = mock.Mock()
+        assistant.chat.side_effect = [
+            ConnectionError("worker lost"),
+            {"response": "hi there", "model": "fake", "conversation_history": []},
+        ]
+        with mock.patch("api.chat.get_assistant", return_value=assistant):
+            jobs.run_job(job)
+            job.refresh_from_db()
+            self.assertEqual(job.status, "failed")
+            jobs.run_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, "done")
+        self.assertEqual(Conversation.objects.filter(user=self.user).count(), 1)
+        self.assertEqual(
+            list(ChatMessage.objects.filter(conversation_id=job.payload["conversation_id"]).values_list("role", flat=True)),
+            ["user", "assistant"],
+        )
+        # The retried call saw the same history as the first one
+        self.assertEqual(assistant.chat.call_args_list[0].args[1], assistant.chat.call_args_list[1].args[1])
+
+
+@override_settings(CHAT_JOB_BACKEND="db", CHAT_JOB_STALE_AFTER=600)
+class ChatJobPollerTests(TransactionTestCase):
+    # Not TestCase: the poller closes connections between claims
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="pw")
+
+    def test_poller_requeues_stale_jobs_and_dispatches_them(self):
+        job = old_job(self.user, "running")
+        with mock.patch.object(jobs, "run_job") as run_job:
+            self.assertEqual(jobs.poll(workers=1, once=True), 1)
+        self.assertEqual(run_job.call_args.args[0].id, job.id)
+        job.refresh_from_db()
+        self.assertEqual(job.status, "running")
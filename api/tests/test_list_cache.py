@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.authentication import tokens_for
+from api.models import Conversation
+
+
+@override_settings(CONVERSATION_LIST_CACHE_TTL=300)
+class ConversationListCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username="bob", password="pw")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {tokens_for(self.user).access_token}"}
+        self.conversation = Conversation.objects.create(user=self.user, title="First")
+
+    def titles(self):
+        response = self.client.get("/api/conversations/", **self.auth)
+        self.assertEqual(response.status_code, 200)
+        return [item["title"] for item in response.json()]
+
+    def test_writes_without_signals_are_not_hidden_by_the_cache(self):
+        # As written by another worker: no invalidation reaches this process
+        self.assertEqual(self.titles(), ["First"])
+        Conversation.objects.filter(id=self.conversation.id).update(title="Renamed", updated_at=timezone.now())
+        self.assertEqual(self.titles(), ["Renamed"])
+        Conversation.objects.filter(id=self.conversation.id).update(deleted_at=timezone.now())
+        self.assertEqual(self.titles(), [])
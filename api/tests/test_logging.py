@@ -0,0 +1,31 @@
+import atexit
+import io
+import json
+import logging
+
+from django.test import SimpleTestCase
+
+from shared.log import QueuedHandler
+
+
+class QueuedHandlerTests(SimpleTestCase):
+    def test_args_are_formatted_when_logged(self):
+        stream = io.StringIO()
+        handler = QueuedHandler(stream=stream)
+        self.addCleanup(handler.close)
+        # The test stops the listener itself
+        self.addCleanup(atexit.unregister, handler.listener.stop)
+        logger = logging.getLogger("api.tests.queued")
+        logger.propagate = False
+        logger.addHandler(handler)
+        self.addCleanup(logger.removeHandler, handler)
+
+        # Stop the listener so the record is formatted only after the mutation
+        handler.listener.stop()
+        items = ["first"]
+        logger.warning("items: %s", items)
+        items.append("second")
+        handler.listener.start()
+        handler.listener.stop()
+
+        self.assertEqual(json.loads(stream.getvalue())["message"], "items: ['first']")
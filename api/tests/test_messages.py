@@ -0,0 +1,79 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from api.archive import archive_conversation, archived_messages
+from api.deletion import reap, soft_delete
+from api.models import ChatMessage, Conversation
+from api.projections import conversation_list_payload, get_conversation_payload
+from api.search import search_messages
+
+
+@override_settings(CHAT_MESSAGE_CLOCK_MARGIN=3600)
+class MessageClockSkewTests(TestCase):
+    """Messages stamped slightly before their conversation (app server clock skew)"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="pw")
+        self.conversation = Conversation.objects.create(user=self.user, title="skewed")
+        self.message = self._message("from a slow clock", seconds_before=30)
+
+    def _message(self, content, seconds_before):
+        message = ChatMessage.objects.create(conversation=self.conversation, role="user", content=content)
+        ChatMessage.objects.filter(id=message.id).update(
+            created_at=self.conversation.created_at - timedelta(seconds=seconds_before)
+        )
+        return message
+
+    def test_reads_include_messages_within_the_margin(self):
+        payload = get_conversation_payload(self.user.id, self.conversation.id)
+        self.assertEqual([m["content"] for m in payload["messages"]], ["from a slow clock"])
+        self.assertEqual(conversation_list_payload(self.user.id)[0]["message_count"], 1)
+
+    def test_unpartitioned_reads_are_not_bounded(self):
+        self._message("from a very slow clock", seconds_before=7200)
+
+        payload = get_conversation_payload(self.user.id, self.conversation.id)
+        self.assertEqual(len(payload["messages"]), 2)
+        self.assertEqual(conversation_list_payload(self.user.id)[0]["message_count"], 2)
+
+    def test_archive_takes_every_message(self):
+        self._message("from a very slow clock", seconds_before=7200)
+        Conversation.objects.filter(id=self.conversation.id).update(updated_at=timezone.now() - timedelta(days=1))
+
+        self.assertIsNotNone(archive_conversation(self.conversation.id, timezone.now()))
+        self.assertEqual(
+            sorted(row[2] for row in archived_messages(self.conversation.id)),
+            ["from a slow clock", "from a very slow clock"],
+        )
+        self.assertFalse(ChatMessage.objects.filter(conversation_id=self.conversation.id).exists())
+
+    @override_settings(CONVERSATION_REAPER_BACKEND="command")
+    def test_reaper_removes_messages_outside_the_margin(self):
+        self._message("from a very slow clock", seconds_before=7200)
+        soft_delete(Conversation.objects.filter(id=self.conversation.id))
+
+        self.assertEqual(reap(sleep=0), (1, 2))
+        self.assertFalse(Conversation.all_objects.filter(id=self.conversation.id).exists())
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="bob", password="pw")
+        self.conversation = Conversation.objects.create(user=self.user, title="idle")
+        ChatMessage.objects.create(conversation=self.conversation, role="user", content="climate policy")
+        Conversation.objects.filter(id=self.conversation.id).update(updated_at=timezone.now() - timedelta(days=60))
+
+    def test_archived_messages_are_searchable_only_after_rehydration(self):
+        out = StringIO()
+        call_command("archive_conversations", days=30, sample_rehydration=0, stdout=out)
+        self.assertIn("Archived 1 conversations", out.getvalue())
+        self.assertIn("api_chatmessage on disk", out.getvalue())
+        self.assertEqual(search_messages(self.user, "climate")["results"], [])
+
+        get_conversation_payload(self.user.id, self.conversation.id)
+        self.assertEqual(len(search_messages(self.user, "climate")["results"]), 1)
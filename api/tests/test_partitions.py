@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from api import partitions
+from api.deletion import reap, soft_delete
+from api.models import ChatMessage, Conversation
+
+
+def partition_of(message_id):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT tableoid::regclass::text FROM api_chatmessage WHERE id = %s", [message_id])
+        return cursor.fetchone()[0]
+
+
+@override_settings(CHAT_MESSAGE_CLOCK_MARGIN=3600, CONVERSATION_REAPER_BACKEND="command")
+class PartitionTests(TransactionTestCase):
+    """Runs the real table swap; the test database is migrated back to a plain table afterwards"""
+
+    def setUp(self):
+        partitions._partitioned = None
+        self.user = User.objects.create_user(username="bob", password="pw")
+        started = timezone.now() - timedelta(days=62)
+        self.conversation = Conversation.objects.create(user=self.user, title="old")
+        Conversation.objects.filter(id=self.conversation.id).update(created_at=started)
+        self.conversation.refresh_from_db()
+        self.messages = {
+            content: self._message(content, created_at)
+            for content, created_at in [
+                ("skewed", started - timedelta(seconds=30)),
+                ("very skewed", started - timedelta(hours=2)),
+                ("recent", timezone.now()),
+            ]
+        }
+
+    def tearDown(self):
+        call_command("migrate", "api", "zero", verbosity=0)
+        call_command("migrate", verbosity=0)
+        partitions._partitioned = None
+
+    def _message(self, content, created_at):
+        message = ChatMessage.objects.create(conversation=self.conversation, role="user", content=content)
+        ChatMessage.objects.filter(id=message.id).update(created_at=created_at)
+        return message
+
+    def test_convert_keeps_rows_and_schema(self):
+        self.assertFalse(partitions.messages_partitioned())
+        partitions._partitioned = None
+
+        self.assertEqual(partitions.convert(ahead=1), 3)
+
+        self.assertTrue(partitions.messages_partitioned())
+        names = [name for name, _, _ in partitions.partitions(connection.cursor())]
+        self.assertEqual(names[-1], partitions.DEFAULT_PARTITION)
+        self.assertIn(partitions.partition_name(partitions.month_start(timezone.now())), names)
+        self.assertEqual(partition_of(self.messages["recent"].id),
+                         partitions.partition_name(partitions.month_start(timezone.now())))
+
+        # Sequence, search trigger and foreign key carried over
+        new = ChatMessage.objects.create(conversation=self.conversation, role="assistant", content="climate news")
+        self.assertGreater(new.id, max(message.id for message in self.messages.values()))
+        self.assertTrue(ChatMessage.objects.filter(id=new.id, search_vector__isnull=False).exists())
+        with self.assertRaises(IntegrityError):
+            ChatMessage.objects.create(conversation_id=self.conversation.id + 1000, role="user", content="orphan")
+
+        # Reads are now bounded, with the clock margin
+        read = ChatMessage.objects.in_conversation(self.conversation.id, self.conversation.created_at)
+        self.assertEqual(sorted(read.values_list("content", flat=True)), ["climate news", "recent", "skewed"])
+
+        # The reaper still removes every message, and then the conversation
+        soft_delete(Conversation.objects.filter(id=self.conversation.id))
+        self.assertEqual(reap(sleep=0), (1, 4))
+        self.assertFalse(Conversation.all_objects.filter(id=self.conversation.id).exists())
+
+    def test_ensure_partitions_moves_rows_out_of_default(self):
+        partitions.convert(ahead=0)
+        later = partitions.add_months(partitions.month_start(timezone.now()), 2)
+        early = self._message("early", later + timedelta(days=3))
+        self.assertEqual(partition_of(early.id), partitions.DEFAULT_PARTITION)
+
+        created = partitions.ensure_partitions(ahead=2)
+
+        self.assertIn(partitions.partition_name(later), created)
+        self.assertEqual(partition_of(early.id), partitions.partition_name(later))
+        self.assertEqual(ChatMessage.objects.count(), 4)
+
+    def test_detach_skips_partitions_with_rows(self):
+        partitions.convert(ahead=0)
+        oldest = partitions.partition_name(partitions.month_start(self.conversation.created_at))
+
+        results = partitions.detach_older_than(1)
+        self.assertIn((oldest, 2, "skipped"), results)
+
+        ChatMessage.objects.exclude(content="recent").delete()
+        results = partitions.detach_older_than(1, drop=True)
+        self.assertIn((oldest, 0, "dropped"), results)
@@ -0,0 +1,50 @@
+import threading
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase
+
+from api import profiling
+from api.authentication import tokens_for
+from api.middleware import ProfilerMiddleware
+from api.models import RequestProfile
+
+
+class ConcurrentProfileTests(TransactionTestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(username="staff", password="pw", is_staff=True)
+        profiling._budget.update(minute=None, count=0)
+
+    def test_two_profiled_requests_at_once(self):
+        # Both requests are inside the view at the same time
+        barrier = threading.Barrier(2, timeout=5)
+
+        def view(request):
+            barrier.wait()
+            return HttpResponse("ok")
+
+        middleware = ProfilerMiddleware(view)
+        header = f"Bearer {tokens_for(self.staff).access_token}"
+        responses = []
+        errors = []
+
+        def call():
+            request = RequestFactory().get("/api/auth/me/", HTTP_AUTHORIZATION=header, HTTP_X_PROFILE="1")
+            try:
+                responses.append(middleware(request).status_code)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=call) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(responses, [200, 200])
+        # The second request ran unprofiled while the first held the profiler
+        self.assertEqual(RequestProfile.objects.count(), 1)
@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from api import projections
+from api.models import ChatMessage, Conversation
+from api.serializers import ConversationListSerializer, ConversationSerializer
+
+render = JSONRenderer().render
+
+
+class ProjectionContractTests(TestCase):
+    """The projections must render byte-identical JSON to the serializers they replace"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="bob", password="pw")
+        now = timezone.now()
+        conversations = Conversation.objects.bulk_create(
+            [Conversation(user=cls.user, title=f"Conversation {i} ünïcödé") for i in range(4)]
+        )
+        # The last conversation stays empty: the null last_message branch
+        for conversation in conversations[:-1]:
+            ChatMessage.objects.bulk_create(
+                [
+                    ChatMessage(
+                        conversation=conversation,
+                        role="user" if i % 2 == 0 else "assistant",
+                        content=f"Message {i} " + "é" * (i * 40) + " 🚀",
+                        has_news_context=i % 3 == 0,
+                        offers_news=i % 2 == 1,
+                    )
+                    for i in range(6)
+                ]
+            )
+        # Distinct timestamps, every conversation older than its messages
+        seeded = list(ChatMessage.objects.filter(conversation__user=cls.user).only("id"))
+        for i, message in enumerate(seeded):
+            message.created_at = now - timedelta(seconds=i)
+        ChatMessage.objects.bulk_update(seeded, ["created_at"])
+        Conversation.objects.filter(user=cls.user).update(created_at=now - timedelta(seconds=len(seeded) + 1))
+
+    def test_list_matches_serializer(self):
+        conversations = Conversation.objects.filter(user=self.user)
+        self.assertEqual(
+            render(projections.conversation_list_payload(self.user.id)),
+            render(ConversationListSerializer(conversations, many=True).data),
+        )
+
+    def test_detail_matches_serializer(self):
+        for conversation in Conversation.objects.filter(user=self.user):
+            with self.subTest(conversation=conversation.title):
+                expected = render(ConversationSerializer(conversation).data)
+                self.assertEqual(render(projections.get_conversation_payload(self.user.id, conversation.id)), expected)
+                self.assertEqual(render(projections.conversation_payload(conversation)), expected)
@@ -0,0 +1,17 @@
+from datetime import datetime, timezone
+
+from django.test import SimpleTestCase
+from rest_framework.renderers import JSONRenderer
+
+from api.renderers import FastJSONRenderer
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_matches_drf_output(self):
+        data = {
+            "content": "line\u2028break\u2029paragraph, café \U0001f600",
+            "created_at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+            "messages": [{"role": "user", "has_news_context": False, "id": 7}],
+        }
+
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
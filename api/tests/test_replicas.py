@@ -0,0 +1,75 @@
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TransactionTestCase, override_settings
+
+from api.checks import check_replica_pin_cache
+from api.middleware import ReplicaMiddleware
+from api.models import ChatJob, Conversation
+from api.replicas import ReplicaRouter, _replica_reads, pin_if_recent_write, record_write, replica_reads
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "replicas"}}
+SHARED = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache_table"}}
+
+
+@override_settings(DATABASE_REPLICAS=["replica"], CACHES=LOCMEM, DB_REPLICA_PIN_SECONDS=5)
+class ReplicaRouterTests(TransactionTestCase):
+    # Not TestCase: its wrapping transaction keeps every read on the primary
+    def setUp(self):
+        cache.clear()
+        self.router = ReplicaRouter()
+
+    def test_reads_go_to_replica_only_inside_replica_reads(self):
+        self.assertEqual(self.router.db_for_read(Conversation), DEFAULT_DB_ALIAS)
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(Conversation), "replica")
+        self.assertEqual(self.router.db_for_write(Conversation), DEFAULT_DB_ALIAS)
+
+    def test_primary_only_models_and_transactions_stay_on_primary(self):
+        with replica_reads():
+            self.assertEqual(self.router.db_for_read(ChatJob), DEFAULT_DB_ALIAS)
+            with transaction.atomic():
+                self.assertEqual(self.router.db_for_read(Conversation), DEFAULT_DB_ALIAS)
+
+    def test_recent_write_pins_user_to_primary(self):
+        record_write(1)
+        with replica_reads():
+            pin_if_recent_write(2)
+            self.assertTrue(_replica_reads.get())
+            pin_if_recent_write(1)
+            self.assertFalse(_replica_reads.get())
+            self.assertEqual(self.router.db_for_read(Conversation), DEFAULT_DB_ALIAS)
+
+    def test_successful_unsafe_request_pins_user(self):
+        user = User.objects.create_user(username="bob", password="pw")
+
+        def view(request):
+            request.user = user
+            return HttpResponse(status=200)
+
+        ReplicaMiddleware(view)(RequestFactory().post("/api/conversations/"))
+        with replica_reads():
+            pin_if_recent_write(user.id)
+            self.assertFalse(_replica_reads.get())
+
+
+class ReplicaPinCacheCheckTests(SimpleTestCase):
+    replica = {**settings.DATABASES[DEFAULT_DB_ALIAS], "HOST": "replica.internal"}
+
+    def test_separate_replica_needs_shared_cache(self):
+        with mock.patch.dict(settings.DATABASES, {"replica_0": self.replica}), \
+                override_settings(DATABASE_REPLICAS=["replica_0"], CACHES=LOCMEM):
+            self.assertEqual([error.id for error in check_replica_pin_cache(None)], ["api.E001"])
+        with mock.patch.dict(settings.DATABASES, {"replica_0": self.replica}), \
+                override_settings(DATABASE_REPLICAS=["replica_0"], CACHES=SHARED):
+            self.assertEqual(check_replica_pin_cache(None), [])
+
+    def test_local_stand_in_replica_passes(self):
+        local = dict(settings.DATABASES[DEFAULT_DB_ALIAS])
+        with mock.patch.dict(settings.DATABASES, {"replica": local}), \
+                override_settings(DATABASE_REPLICAS=["replica"], CACHES=LOCMEM):
+            self.assertEqual(check_replica_pin_cache(None), [])
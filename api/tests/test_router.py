@@ -0,0 +1,102 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from django.test import SimpleTestCase
+
+from api.ai.router import ModelRouter
+
+MODELS = {
+    "slow": {"deadline": 2.0, "fallback": "fast", "cost": 2},
+    "fast": {"deadline": 2.0, "fallback": None, "cost": 1},
+}
+
+
+class ScriptedClient:
+    """OpenAI client stand-in; ``behaviour[model](call)`` returns or raises"""
+
+    def __init__(self, **behaviour):
+        self.behaviour = behaviour
+        self.threads = []
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model, messages, timeout, **kwargs):
+        self.threads.append((model, threading.current_thread()))
+        return self.behaviour[model](timeout)
+
+
+def warm(router, model, latency):
+    for _ in range(30):
+        router.stats[model].record(latency)
+
+
+class ModelRouterTests(SimpleTestCase):
+    def test_hedge_wins_over_slow_primary(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def slow(timeout):
+            release.wait(timeout)
+            return "slow answer"
+
+        client = ScriptedClient(slow=slow, fast=lambda timeout: "fast answer")
+        router = ModelRouter(client, models=MODELS, default_model="slow", max_workers=2)
+        warm(router, "slow", 0.05)
+
+        started = time.monotonic()
+        self.assertEqual(router.create("slow", []), ("fast answer", "fast"))
+        self.assertLess(time.monotonic() - started, 1.0)
+
+    def test_hedge_is_not_sent_when_primary_answers_in_time(self):
+        client = ScriptedClient(slow=lambda timeout: "slow answer", fast=lambda timeout: "fast answer")
+        router = ModelRouter(client, models=MODELS, default_model="slow", max_workers=2)
+        warm(router, "slow", 0.5)
+
+        self.assertEqual(router.create("slow", []), ("slow answer", "slow"))
+        time.sleep(0.6)
+        self.assertEqual([model for model, _ in client.threads], ["slow"])
+
+    def test_failed_hedge_waits_for_primary(self):
+        def slow(timeout):
+            time.sleep(0.3)
+            return "slow answer"
+
+        def fast(timeout):
+            raise ConnectionError("upstream reset")
+
+        client = ScriptedClient(slow=slow, fast=fast)
+        router = ModelRouter(client, models=MODELS, default_model="slow", max_workers=2)
+        warm(router, "slow", 0.05)
+
+        self.assertEqual(router.create("slow", []), ("slow answer", "slow"))
+
+    def test_queued_hedge_is_cancelled_when_primary_answers(self):
+        # One worker: the hedge queues behind the primary and must never run
+        def slow(timeout):
+            time.sleep(0.2)
+            return "slow answer"
+
+        client = ScriptedClient(slow=slow, fast=lambda timeout: "fast answer")
+        router = ModelRouter(client, models=MODELS, default_model="slow", max_workers=1)
+        warm(router, "slow", 0.05)
+
+        self.assertEqual(router.create("slow", []), ("slow answer", "slow"))
+        router._executor.shutdown(wait=True)
+        self.assertEqual([model for model, _ in client.threads], ["slow"])
+
+    def test_fallback_retry_gets_the_remaining_deadline(self):
+        timeouts = []
+
+        def slow(timeout):
+            time.sleep(0.3)
+            raise ConnectionError("upstream reset")
+
+        def fast(timeout):
+            timeouts.append(timeout)
+            return "fast answer"
+
+        client = ScriptedClient(slow=slow, fast=fast)
+        router = ModelRouter(client, models=MODELS, default_model="slow", max_workers=2)
+
+        self.assertEqual(router.create("slow", []), ("fast answer", "fast"))
+        self.assertLess(timeouts[0], MODELS["slow"]["deadline"] - 0.25)
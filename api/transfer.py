@@ -0,0 +1,217 @@
+"""
+JSONL export and import of conversations.
+
+One JSON object per line: each conversation, immediately followed by its
+messages in order::
+
+    {"type": "conversation", "id": 7, "user": "bob", "title": "...", "created_at": "...", "updated_at": "..."}
+    {"type": "message", "conversation": 7, "role": "user", "content": "...", "has_news_context": false, ...}
+
+Both directions stream: export reads conversations and messages through two
+chunked iterators merged by conversation id (archived conversations are
+decoded from their archive, one at a time, without being rehydrated), and
+import holds at most one batch in memory. Ids are not kept across an import;
+timestamps are.
+"""
+import json
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils.dateparse import parse_datetime
+
+from .archive import archived_messages
+from .models import ChatMessage, Conversation
+
+CONVERSATION_COLUMNS = ('id', 'user__username', 'title', 'created_at', 'updated_at', 'is_archived')
+MESSAGE_COLUMNS = ('conversation_id', 'role', 'content', 'has_news_context', 'offers_news', 'created_at')
+
+
+class TransferError(Exception):
+    pass
+
+
+def _line(record):
+    return json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def _message_line(conversation_id, role, content, has_news_context, offers_news, created_at):
+    return _line({
+        'type': 'message',
+        'conversation': conversation_id,
+        'role': role,
+        'content': content,
+        'has_news_context': has_news_context,
+        'offers_news': offers_news,
+        'created_at': created_at.isoformat(),
+    })
+
+
+def _datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f"invalid timestamp {value!r}")
+    return parsed
+
+
+def export_lines(conversations, chunk_size=None):
+    """Yield the JSONL lines for a queryset of conversations, in id order"""
+    chunk_size = chunk_size or settings.TRANSFER_CHUNK_SIZE
+    conversations = conversations.order_by('id')
+    messages = (
+        ChatMessage.objects
+        .filter(conversation__in=conversations.filter(is_archived=False).values('id'))
+        .order_by('conversation_id', 'created_at', 'id')
+        .values_list(*MESSAGE_COLUMNS)
+        .iterator(chunk_size=chunk_size)
+    )
+    pending = next(messages, None)
+
+    for conversation_id, username, title, created_at, updated_at, is_archived in (
+        conversations.values_list(*CONVERSATION_COLUMNS).iterator(chunk_size=chunk_size)
+    ):
+        yield _line({
+            'type': 'conversation',
+            'id': conversation_id,
+            'user': username,
+            'title': title,
+            'created_at': created_at.isoformat(),
+            'updated_at': updated_at.isoformat(),
+        })
+        if is_archived:
+            for _, role, content, has_news, offers_news, message_created_at in archived_messages(conversation_id):
+                yield _message_line(conversation_id, role, content, has_news, offers_news, message_created_at)
+            continue
+        # Messages of conversations archived or deleted since the cursor opened
+        while pending is not None and pending[0] < conversation_id:
+            pending = next(messages, None)
+        while pending is not None and pending[0] == conversation_id:
+            yield _message_line(*pending)
+            pending = next(messages, None)
+
+
+class Importer:
+    """
+    Feeds JSONL lines into the database in batches of ``batch_size`` rows,
+    each in its own transaction. Conversations go through bulk_create;
+    messages through a multi-row INSERT, because bulk_create would replace
+    their created_at (auto_now_add), which ChatMessage.objects.in_conversation
+    compares with the conversation's.
+    """
+
+    def __init__(self, batch_size=None, user=None, create_users=False):
+        self.batch_size = batch_size or settings.TRANSFER_CHUNK_SIZE
+        self.user = user
+        self.create_users = create_users
+        self.conversations = []  # (source id, Conversation, created_at, updated_at)
+        self.messages = []  # (source conversation id, row without conversation_id)
+        self.ids = {}  # source conversation id -> new id
+        self.current = None  # source id of the last conversation read
+        self.user_ids = {}  # username -> id
+        self.conversation_count = 0
+        self.message_count = 0
+
+    def feed(self, line, line_number):
+        if not line.strip():
+            return
+        try:
+            record = json.loads(line)
+            if record['type'] == 'conversation':
+                conversation = Conversation(
+                    user_id=self._user_id(record['user']),
+                    title=record['title'],
+                )
+                self.current = record['id']
+                self.conversations.append((
+                    record['id'], conversation,
+                    _datetime(record['created_at']), _datetime(record['updated_at']),
+                ))
+            elif record['type'] == 'message':
+                if record['conversation'] != self.current:
+                    raise TransferError(f"message does not follow conversation {record['conversation']}")
+                self.messages.append((record['conversation'], (
+                    record['role'], record['content'], record['has_news_context'],
+                    record['offers_news'], _datetime(record['created_at']),
+                )))
+            else:
+                raise TransferError(f"unknown type {record['type']!r}")
+        except (ValueError, KeyError, TypeError, TransferError) as e:
+            raise TransferError(f"Line {line_number}: {e}") from e
+        if len(self.conversations) + len(self.messages) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.conversations and not self.messages:
+            return
+        with transaction.atomic():
+            if self.conversations:
+                created = Conversation.objects.bulk_create([c for _, c, _, _ in self.conversations])
+                # bulk_create stamps both fields with now(); restore the originals
+                Conversation.objects.filter(id__in=[c.id for c in created]).update(
+                    created_at=Case(*[When(id=c.id, then=Value(created_at))
+                                      for _, c, created_at, _ in self.conversations], output_field=DateTimeField()),
+                    updated_at=Case(*[When(id=c.id, then=Value(updated_at))
+                                      for _, c, _, updated_at in self.conversations], output_field=DateTimeField()),
+                )
+                self.ids.update((source_id, c.id) for source_id, c, _, _ in self.conversations)
+            _insert_messages([(self.ids[source_id],) + row for source_id, row in self.messages])
+
+        self.conversation_count += len(self.conversations)
+        self.message_count += len(self.messages)
+        # Messages follow their conversation, so only the last one can still
+        # receive messages in a later batch.
+        if self.conversations:
+            last_source_id = self.conversations[-1][0]
+            self.ids = {last_source_id: self.ids[last_source_id]}
+        self.conversations = []
+        self.messages = []
+
+    def _user_id(self, username):
+        if self.user is not None:
+            return self.user.id
+        if username not in self.user_ids:
+            user = User.objects.filter(username=username).first()
+            if user is None:
+                if not self.create_users:
+                    raise TransferError(f"no user {username!r} (pass --create-users or --user)")
+                user = User.objects.create_user(username=username)  # unusable password
+            self.user_ids[username] = user.id
+        return self.user_ids[username]
+
+
+def _insert_messages(rows):
+    if not rows:
+        return
+    fields = [ChatMessage._meta.get_field(name) for name in MESSAGE_COLUMNS]
+    table = connection.ops.quote_name(ChatMessage._meta.db_table)
+    columns = ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    row_placeholder = '(' + ', '.join(['%s'] * len(fields)) + ')'
+    per_statement = max(1, connection.ops.bulk_batch_size(fields, rows))
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), per_statement):
+            batch = rows[start:start + per_statement]
+            cursor.execute(
+                f"INSERT INTO {table} ({columns}) VALUES {', '.join([row_placeholder] * len(batch))}",
+                [field.get_db_prep_value(value, connection) for row in batch for field, value in zip(fields, row)],
+            )
+
+
+def import_lines(lines, batch_size=None, user=None, create_users=False, progress=None):
+    """
+    Import JSONL ``lines``. ``progress(importer, elapsed_seconds)`` is called
+    after every committed batch. Returns the Importer with the final counts.
+    """
+    importer = Importer(batch_size=batch_size, user=user, create_users=create_users)
+    started = time.monotonic()
+    committed = 0
+    for line_number, line in enumerate(lines, start=1):
+        importer.feed(line, line_number)
+        if progress and importer.conversation_count + importer.message_count != committed:
+            committed = importer.conversation_count + importer.message_count
+            progress(importer, time.monotonic() - started)
+    importer.flush()
+    if progress and importer.conversation_count + importer.message_count != committed:
+        progress(importer, time.monotonic() - started)
+    return importer
@@ -16,8 +16,16 @@ urlpatterns = [
     path("conversations/<int:conversation_id>/", views.get_conversation, name="get_conversation"),
     path("conversations/<int:conversation_id>/update/", views.update_conversation, name="update_conversation"),
     path("conversations/<int:conversation_id>/delete/", views.delete_conversation, name="delete_conversation"),
+    path("conversations/bulk-delete/", views.bulk_delete_conversations, name="bulk_delete_conversations"),
+    path("conversations/export/", views.export_conversations, name="export_conversations"),
+    path("search/", views.search_messages, name="search_messages"),
     
     # Chat endpoints
     path("chat/", views.chat, name="chat"),
+    path("chat/batch/", views.chat_batch, name="chat_batch"),
+    path("chat/jobs/<uuid:job_id>/", views.get_chat_job, name="get_chat_job"),
     path("chat/reset/", views.reset_conversation, name="reset_conversation"),
+
+    # Operations
+    path("metrics/", views.metrics, name="metrics"),
 ]
\ No newline at end of file
@@ -1,21 +1,31 @@
+import json
+
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework import status
 from django.contrib.auth.models import User
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.http import StreamingHttpResponse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
 
-from .ai.model import AIAssistant
-from .models import Conversation, ChatMessage
+from . import dbstats, etags, jobs, list_cache, projections, search, transfer
+from .authentication import CachedRefreshToken, tokens_for
+from .batch import BatchError, parse_jsonl, run_batch
+from .ai.prompt import prompt_cache_stats
+from .ai.router import ModelNotAllowed
+from .chat import ChatError, get_conversation_for, run_turn
+from .containers import get_assistant
+from .deletion import soft_delete
+from .models import Conversation, ChatJob
+from .sessions import get_history_store
 from .serializers import (
+    ChatRequestSerializer,
     ConversationSerializer, 
-    ConversationListSerializer, 
     ChatMessageSerializer,
     UserSerializer,
 )
 
-assistant = AIAssistant()
-
 
 # ============== AUTH VIEWS ==============
 
@@ -62,7 +72,7 @@ def register_user(request):
         )
         
         # Generate JWT tokens for immediate login
-        refresh = RefreshToken.for_user(user)
+        refresh = tokens_for(user)
         
         return Response({
             'user': UserSerializer(user).data,
@@ -100,7 +110,7 @@ def logout_user(request):
     try:
         refresh_token = request.data.get('refresh')
         if refresh_token:
-            token = RefreshToken(refresh_token)
+            token = CachedRefreshToken(refresh_token)
             token.blacklist()
         return Response({'message': 'Logged out successfully'})
     except Exception:
@@ -111,15 +121,17 @@ def logout_user(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etags.conversation_list_etag, last_modified_func=etags.conversation_list_last_modified)
 def list_conversations(request):
     """
     List all conversations for the authenticated user.
     
     GET /api/conversations/
+    
+    Supports If-None-Match / If-Modified-Since; unchanged lists return 304.
     """
-    conversations = Conversation.objects.filter(user=request.user)
-    serializer = ConversationListSerializer(conversations, many=True)
-    return Response(serializer.data)
+    return Response(list_cache.get_conversation_list(request.user.id, etags.conversation_list_state(request)))
 
 
 @api_view(['POST'])
@@ -132,25 +144,29 @@ def create_conversation(request):
     Body: { "title": "Optional title" }
     """
     title = request.data.get('title', 'New Chat')
-    conversation = Conversation.objects.create(user=request.user, title=title)
+    conversation = Conversation.objects.create(user_id=request.user.id, title=title)
     serializer = ConversationSerializer(conversation)
     return Response(serializer.data, status=status.HTTP_201_CREATED)
 
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=etags.conversation_etag, last_modified_func=etags.conversation_last_modified)
 def get_conversation(request, conversation_id):
     """
     Get a specific conversation with all messages.
     
     GET /api/conversations/<id>/
+    
+    Supports If-None-Match / If-Modified-Since; unchanged conversations return 304.
+    Opening an archived conversation rehydrates it: this GET then writes to
+    the primary, and pins the user's reads to it for DB_REPLICA_PIN_SECONDS.
     """
-    try:
-        conversation = Conversation.objects.get(id=conversation_id, user=request.user)
-        serializer = ConversationSerializer(conversation)
-        return Response(serializer.data)
-    except Conversation.DoesNotExist:
+    payload = projections.get_conversation_payload(request.user.id, conversation_id)
+    if payload is None:
         return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(payload)
 
 
 @api_view(['DELETE'])
@@ -161,12 +177,49 @@ def delete_conversation(request, conversation_id):
     
     DELETE /api/conversations/<id>/
     """
-    try:
-        conversation = Conversation.objects.get(id=conversation_id, user=request.user)
-        conversation.delete()
-        return Response({'message': 'Conversation deleted'})
-    except Conversation.DoesNotExist:
+    deleted = soft_delete(Conversation.objects.filter(id=conversation_id, user_id=request.user.id))
+    if not deleted:
         return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response({'message': 'Conversation deleted'})
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def bulk_delete_conversations(request):
+    """
+    Delete several conversations, or all of them.
+    
+    POST /api/conversations/bulk-delete/
+    Body: { "ids": [1, 2, 3] } or { "all": true }
+    """
+    conversations = Conversation.objects.filter(user_id=request.user.id)
+    if request.data.get('all') is not True:
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+            return Response(
+                {'error': 'Provide "ids" as a list of conversation ids, or "all": true'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        conversations = conversations.filter(id__in=ids)
+    return Response({'deleted': soft_delete(conversations)})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_conversations(request):
+    """
+    Download all of the user's conversations with their messages as JSONL.
+    
+    GET /api/conversations/export/
+    
+    Streamed in constant memory, see api.transfer for the format.
+    """
+    response = StreamingHttpResponse(
+        transfer.export_lines(Conversation.objects.filter(user_id=request.user.id)),
+        content_type='application/x-ndjson',
+    )
+    response['Content-Disposition'] = 'attachment; filename="conversations.jsonl"'
+    return response
 
 
 @api_view(['PATCH'])
@@ -179,17 +232,39 @@ def update_conversation(request, conversation_id):
     Body: { "title": "New Title" }
     """
     try:
-        conversation = Conversation.objects.get(id=conversation_id, user=request.user)
+        conversation = Conversation.objects.get(id=conversation_id, user_id=request.user.id)
         title = request.data.get('title')
         if title:
             conversation.title = title
             conversation.save()
-        serializer = ConversationSerializer(conversation)
-        return Response(serializer.data)
+        return Response(projections.conversation_payload(conversation))
     except Conversation.DoesNotExist:
         return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def search_messages(request):
+    """
+    Full-text search across the user's conversations.
+    
+    GET /api/search/?q=climate policy&limit=20&cursor=<next_cursor>
+    
+    Archived conversations are not searched until they are opened again.
+    
+    Returns: { "results": [{ "message_id", "conversation_id", "snippet", ... }], "next_cursor": "..." }
+    """
+    text = request.query_params.get('q', '').strip()
+    if not text:
+        return Response({'error': 'Query is required'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        limit = int(request.query_params.get('limit', search.DEFAULT_LIMIT))
+        return Response(search.search_messages(request.user, text, limit, request.query_params.get('cursor')))
+    except (search.InvalidCursor, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+
 # ============== CHAT VIEWS ==============
 
 @api_view(['POST'])
@@ -197,71 +272,136 @@ def update_conversation(request, conversation_id):
 def chat(request):
     """
     Handle chat requests. Saves messages to database if user is authenticated.
+    
+    POST /api/chat/
+    Body: { "message": "...", "conversation_id": 1, "model": "gpt-4o-mini", "async": false }
+    
+    Anonymous users send the "session_token" returned by their previous turn
+    instead of a conversation id; their history is kept on the server (per
+    worker process unless ANON_HISTORY_BACKEND is "cache"). Tokens are issued
+    by the server only: an unknown or expired token starts a new session,
+    and the response carries its new token.
+
+    "message" is limited to CHAT_MESSAGE_MAX_CHARS characters.
+    
+    With "async": true the turn is queued and the response is 202 with a
+    job id to poll at GET /api/chat/jobs/<job_id>/.
     """
     try:
-        message = request.data.get('message')
+        serializer = ChatRequestSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response({'error': serializer.errors['message'][0]}, status=status.HTTP_400_BAD_REQUEST)
+        message = serializer.validated_data['message']
         conversation_id = request.data.get('conversation_id')
-        history = request.data.get('history', [])
-        model = request.data.get('model', 'gpt-4o-mini')  # Get model from request
+        session_token = request.data.get('session_token')
+        model = request.data.get('model')  # Optional, must be on the allow-list
         
-        if not message:
-            return Response({'error': 'Message is required'}, status=status.HTTP_400_BAD_REQUEST)
+        if model:
+            try:
+                get_assistant().router.resolve(model)
+            except ModelNotAllowed as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        conversation = None
-        
-        if request.user.is_authenticated:
-            if conversation_id:
-                try:
-                    conversation = Conversation.objects.get(id=conversation_id, user=request.user)
-                except Conversation.DoesNotExist:
-                    return Response({'error': 'Conversation not found'}, status=status.HTTP_404_NOT_FOUND)
-            else:
-                title = message[:50] + "..." if len(message) > 50 else message
-                conversation = Conversation.objects.create(user=request.user, title=title)
-            
-            ChatMessage.objects.create(
-                conversation=conversation,
-                role='user',
-                content=message
-            )
-            
-            history = [
-                {'role': msg.role, 'content': msg.content}
-                for msg in conversation.messages.all()
-            ]
-        
-        # Pass model to AI assistant
-        result = assistant.chat(message, history, model=model)
-        
-        if conversation:
-            ChatMessage.objects.create(
-                conversation=conversation,
-                role='assistant',
-                content=result['response'],
-                has_news_context=result.get('has_news_context', False)
-            )
-            conversation.save()
-        
-        response_data = {
-            'response': result['response'],
-            'has_news_context': result.get('has_news_context', False),
-            'model': model  # Return which model was used
-        }
-        
-        if conversation:
-            response_data['conversation_id'] = conversation.id
-            response_data['conversation'] = ConversationSerializer(conversation).data
-        else:
-            response_data['history'] = result['conversation_history']
-        
-        return Response(response_data)
+        if request.data.get('async'):
+            # Anonymous session tokens are checked when the job runs
+            if request.user.is_authenticated and conversation_id:
+                get_conversation_for(request.user, conversation_id)
+            try:
+                job = jobs.enqueue(request, {
+                    'message': message,
+                    'conversation_id': conversation_id,
+                    'session_token': session_token,
+                    'model': model,
+                })
+            except jobs.QueueFull as e:
+                return Response({'error': str(e)}, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            return Response(jobs.job_payload(job), status=status.HTTP_202_ACCEPTED)
         
+        return Response(run_turn(request.user, message, conversation_id, session_token, model))
+    
+    except ChatError as e:
+        return Response({'error': str(e)}, status=e.status_code)
     except Exception as e:
         return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def get_chat_job(request, job_id):
+    """
+    Get the status of a background chat turn, and its result once done.
+    
+    GET /api/chat/jobs/<job_id>/
+    """
+    try:
+        job = ChatJob.objects.get(id=job_id)
+    except ChatJob.DoesNotExist:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    if job.user_id is not None and job.user_id != request.user.id:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(jobs.job_payload(job))
+
+
+@api_view(['POST'])
+@permission_classes([IsAdminUser])
+def chat_batch(request):
+    """
+    Run many chat requests at once for evaluation. Staff only, nothing is saved.
+    
+    POST /api/chat/batch/?concurrency=8
+    Body: JSONL (Content-Type: application/x-ndjson), one
+          { "id": "...", "message": "...", "history": [...], "model": "..." } per line,
+          or JSON { "items": [...], "concurrency": 8 }
+    
+    Streams JSONL results as items complete, then a final { "summary": {...} } line.
+    """
+    try:
+        if request.content_type.startswith(('application/x-ndjson', 'application/jsonl')):
+            items = parse_jsonl(request.body.splitlines())
+            concurrency = request.query_params.get('concurrency')
+        else:
+            if not isinstance(request.data, dict):
+                raise BatchError("Body must be a JSON object with an 'items' list")
+            items = request.data.get('items', [])
+            if not isinstance(items, list):
+                raise BatchError("'items' must be a list")
+            items = parse_jsonl(json.dumps(item) for item in items)
+            concurrency = request.data.get('concurrency', request.query_params.get('concurrency'))
+        concurrency = int(concurrency) if concurrency else None
+    except (BatchError, ValueError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    lines = (json.dumps(result, default=str) + "\n" for result in run_batch(items, concurrency))
+    return StreamingHttpResponse(lines, content_type='application/x-ndjson')
+
+
 @api_view(['POST'])
 @permission_classes([AllowAny])
 def reset_conversation(request):
-    """Reset conversation history (for anonymous users)"""
+    """
+    Reset conversation history (for anonymous users).
+    
+    POST /api/chat/reset/
+    Body: { "session_token": "..." }
+    """
+    session_token = request.data.get('session_token')
+    if isinstance(session_token, str):
+        get_history_store().delete(session_token)
     return Response({'message': 'Conversation reset', 'history': []})
+
+
+# ============== METRICS ==============
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """
+    Counters of this worker process.
+    
+    GET /api/metrics/
+    """
+    return Response({
+        'conversation_list_cache': list_cache.stats(),
+        'database': dbstats.stats(),
+        'prompt_cache': prompt_cache_stats.snapshot(),
+    })
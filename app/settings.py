@@ -1,15 +1,95 @@
 from pathlib import Path
 import shared.config as config
+import importlib.util
 import os
-from dotenv import load_dotenv
-
-load_dotenv()
 
 
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4-turbo-preview')
 EMBEDDING_MODEL = os.getenv('EMBEDDING_MODEL', 'text-embedding-3-small')
 
+# Upstream HTTP pools (OpenAI, NewsAPI). Each worker process keeps one pool;
+# size AI_HTTP_MAX_CONNECTIONS to at least the number of worker threads.
+AI_HTTP_MAX_CONNECTIONS = int(os.getenv('AI_HTTP_MAX_CONNECTIONS', '20'))
+AI_HTTP_MAX_KEEPALIVE = int(os.getenv('AI_HTTP_MAX_KEEPALIVE', '10'))
+AI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('AI_HTTP_KEEPALIVE_EXPIRY', '30'))
+AI_HTTP_CONNECT_TIMEOUT = float(os.getenv('AI_HTTP_CONNECT_TIMEOUT', '5'))
+AI_HTTP_READ_TIMEOUT = float(os.getenv('AI_HTTP_READ_TIMEOUT', '60'))
+# Pre-open upstream connections when a WSGI worker starts
+AI_WARMUP = os.getenv('AI_WARMUP', 'false').lower() == 'true'
+
+# Background chat jobs. "thread" runs them on an in-process pool, "db" leaves
+# them queued for `manage.py run_chat_jobs`.
+CHAT_JOB_BACKEND = os.getenv('CHAT_JOB_BACKEND', 'thread')
+CHAT_JOB_WORKERS = int(os.getenv('CHAT_JOB_WORKERS', '4'))
+CHAT_JOB_MAX_PER_USER = int(os.getenv('CHAT_JOB_MAX_PER_USER', '3'))
+# Running jobs older than this (seconds) are assumed lost and requeued
+CHAT_JOB_STALE_AFTER = int(os.getenv('CHAT_JOB_STALE_AFTER', '600'))
+
+# Batch evaluation runs (staff endpoint and `manage.py chat_batch`)
+CHAT_BATCH_CONCURRENCY = int(os.getenv('CHAT_BATCH_CONCURRENCY', '4'))
+CHAT_BATCH_MAX_CONCURRENCY = int(os.getenv('CHAT_BATCH_MAX_CONCURRENCY', '16'))
+CHAT_BATCH_MAX_ITEMS = int(os.getenv('CHAT_BATCH_MAX_ITEMS', '1000'))
+
+# Longest accepted chat message (POST /api/chat/ and batch items)
+CHAT_MESSAGE_MAX_CHARS = int(os.getenv('CHAT_MESSAGE_MAX_CHARS', '8000'))
+
+# Server-side history for anonymous chat sessions. "local" keeps it in the
+# memory of each worker process: with several workers (or run_chat_jobs), a
+# turn served by another process starts without history. "cache" uses the
+# ANON_HISTORY_CACHE_ALIAS cache backend, which must then be a shared one
+# (Redis, Memcached, database), not the default per-process LocMemCache.
+ANON_HISTORY_BACKEND = os.getenv('ANON_HISTORY_BACKEND', 'local')
+ANON_HISTORY_CACHE_ALIAS = os.getenv('ANON_HISTORY_CACHE_ALIAS', 'default')
+ANON_HISTORY_TTL = int(os.getenv('ANON_HISTORY_TTL', '3600'))
+ANON_HISTORY_MAX_SESSIONS = int(os.getenv('ANON_HISTORY_MAX_SESSIONS', '10000'))
+ANON_HISTORY_MAX_MESSAGES = int(os.getenv('ANON_HISTORY_MAX_MESSAGES', '40'))
+ANON_HISTORY_MAX_BYTES = int(os.getenv('ANON_HISTORY_MAX_BYTES', '65536'))
+
+# Cold storage: conversations idle this many days are compressed by
+# `manage.py archive_conversations`. "zstd" needs the zstandard package.
+ARCHIVE_AFTER_DAYS = int(os.getenv('ARCHIVE_AFTER_DAYS', '90'))
+ARCHIVE_CODEC = os.getenv('ARCHIVE_CODEC', 'zlib')
+
+# Rows per database round trip for JSONL export, and per transaction for
+# import (`manage.py export_conversations` / `import_conversations`).
+TRANSFER_CHUNK_SIZE = int(os.getenv('TRANSFER_CHUNK_SIZE', '2000'))
+
+# Admin changelists count exactly up to this many rows and use the
+# PostgreSQL planner's estimate above it.
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+
+# Deleted conversations are hidden at once and removed in the background:
+# "thread" reaps in-process after each delete, "command" leaves it to
+# `manage.py reap_conversations` (cron).
+CONVERSATION_REAPER_BACKEND = os.getenv('CONVERSATION_REAPER_BACKEND', 'thread')
+CONVERSATION_REAPER_BATCH_SIZE = int(os.getenv('CONVERSATION_REAPER_BATCH_SIZE', '1000'))
+CONVERSATION_REAPER_SLEEP = float(os.getenv('CONVERSATION_REAPER_SLEEP', '0.05'))
+
+# Once the message table is partitioned, reads are bounded by the
+# conversation's created_at minus this many seconds, so partitions can be
+# pruned without hiding messages stamped by a worker whose clock is behind.
+CHAT_MESSAGE_CLOCK_MARGIN = int(os.getenv('CHAT_MESSAGE_CLOCK_MARGIN', '3600'))
+
+# Per-user conversation list cache (0 disables). Entries are keyed by the
+# list's database state, so a process-local cache is safe; a shared backend
+# such as Redis lets workers share hits.
+CONVERSATION_LIST_CACHE_ALIAS = os.getenv('CONVERSATION_LIST_CACHE_ALIAS', 'default')
+CONVERSATION_LIST_CACHE_TTL = int(os.getenv('CONVERSATION_LIST_CACHE_TTL', '300'))
+
+# Request profiler: staff users get a report for requests sent with
+# "X-Profile: 1"; PROFILER_SAMPLE_RATE profiles that fraction of all traffic.
+# Reports are in the admin and capped per minute, in total and by age.
+PROFILER_ALLOW_STAFF = os.getenv('PROFILER_ALLOW_STAFF', 'true').lower() == 'true'
+PROFILER_SAMPLE_RATE = float(os.getenv('PROFILER_SAMPLE_RATE', '0'))
+PROFILER_MAX_PER_MINUTE = int(os.getenv('PROFILER_MAX_PER_MINUTE', '10'))
+PROFILER_MAX_REPORTS = int(os.getenv('PROFILER_MAX_REPORTS', '500'))
+PROFILER_RETENTION_DAYS = int(os.getenv('PROFILER_RETENTION_DAYS', '7'))
+PROFILER_TOP_FUNCTIONS = int(os.getenv('PROFILER_TOP_FUNCTIONS', '40'))
+PROFILER_MAX_QUERIES = int(os.getenv('PROFILER_MAX_QUERIES', '200'))
+PROFILER_MAX_SQL_CHARS = int(os.getenv('PROFILER_MAX_SQL_CHARS', '500'))
+PROFILER_MAX_REPORT_CHARS = int(os.getenv('PROFILER_MAX_REPORT_CHARS', '20000'))
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 
 
@@ -30,6 +110,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'rest_framework_simplejwt.token_blacklist',
@@ -38,6 +119,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.middleware.RequestLogMiddleware',
+    'api.middleware.ProfilerMiddleware',
+    'api.middleware.ReplicaMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -50,6 +134,31 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "app.urls"
 
+# JSON logs to stdout. Formatting and I/O run on a QueueListener thread, not
+# the request thread. LOG_DEBUG_SAMPLE_RATE keeps that fraction of DEBUG
+# records (per-call model and NewsAPI timings) when LOG_LEVEL=DEBUG.
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'queued_json': {
+            '()': 'shared.log.QueuedHandler',
+            'debug_sample_rate': float(os.getenv('LOG_DEBUG_SAMPLE_RATE', '1.0')),
+        },
+    },
+    'root': {
+        'handlers': ['queued_json'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        # Route Django's own records through the JSON handler only
+        'django': {'level': LOG_LEVEL},
+        # Request lines come from api.middleware.RequestLogMiddleware instead
+        'django.server': {'level': 'WARNING'},
+    },
+}
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -75,9 +184,46 @@ DATABASES = {
         "HOST": config.DB_HOST,
         "PORT": config.DB_PORT,
         "PASSWORD": config.DB_PASS,
+        "CONN_MAX_AGE": config.DB_CONN_MAX_AGE,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {},
     }
 }
 
+# Django uses psycopg 3 when it is installed and psycopg2 otherwise; only the
+# former supports the native pool, which replaces persistent connections.
+DB_POOL_ENABLED = config.DB_POOL and all(importlib.util.find_spec(name) for name in ("psycopg", "psycopg_pool"))
+if DB_POOL_ENABLED:
+    DATABASES["default"]["CONN_MAX_AGE"] = 0
+    DATABASES["default"]["OPTIONS"]["pool"] = {
+        "min_size": config.DB_POOL_MIN_SIZE,
+        "max_size": config.DB_POOL_MAX_SIZE,
+        "timeout": config.DB_POOL_TIMEOUT,
+    }
+
+# Safe requests read from these aliases, see api.replicas. TEST.MIRROR makes
+# the test runner use the default connection for them.
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(config.DB_REPLICA_HOSTS):
+    host, _, port = replica_host.partition(":")
+    DATABASES[f"replica_{index}"] = {
+        **DATABASES["default"],
+        "HOST": host,
+        "PORT": port or config.DB_PORT,
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append(f"replica_{index}")
+if config.DB_REPLICA_LOCAL and not DATABASE_REPLICAS:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "OPTIONS": dict(DATABASES["default"]["OPTIONS"]),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_REPLICAS.append("replica")
+DATABASE_ROUTERS = ["api.replicas.ReplicaRouter"]
+DB_REPLICA_PIN_SECONDS = config.DB_REPLICA_PIN_SECONDS
+
 # CORS
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
@@ -88,10 +234,23 @@ CORS_ALLOW_CREDENTIALS = True
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.ClaimsJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ),
 }
 
+# Convert JSON keys to camelCase in responses (and back to snake_case in
+# requests). Off by default so existing clients keep the snake_case format.
+API_CAMEL_CASE = os.getenv('API_CAMEL_CASE', 'false').lower() == 'true'
+
 # JWT
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -99,8 +258,18 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_OBTAIN_SERIALIZER': 'api.serializers.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'api.serializers.CachedTokenRefreshSerializer',
 }
 
+# Seconds a "not blacklisted" refresh token check stays cached (0 disables).
+# Only used with a shared cache backend (Redis, Memcached): in a per-process
+# cache a logout in one worker would not reach the others' cached answer.
+JWT_BLACKLIST_NEGATIVE_TTL = int(os.getenv('JWT_BLACKLIST_NEGATIVE_TTL', '0'))
+
+# Seconds a claims-authenticated user's "still active" check stays cached (0 disables)
+AUTH_USER_CACHE_TTL = int(os.getenv('AUTH_USER_CACHE_TTL', '60'))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     # {
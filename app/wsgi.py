@@ -5,3 +5,16 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "app.settings")
 
 application = get_wsgi_application()
+
+from django.conf import settings  # noqa: E402
+
+if settings.AI_WARMUP:
+    from api.containers import warmup
+
+    warmup()
+
+if settings.CHAT_JOB_BACKEND == "thread":
+    # Pick up jobs queued or left running before this process started
+    from api.jobs import start_poller
+
+    start_poller()
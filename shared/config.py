@@ -1,6 +1,7 @@
 from dotenv import load_dotenv
 import os
 
+# The only place .env is read: settings import this module first
 load_dotenv()
 
 DEBUG = True
@@ -11,6 +12,46 @@ DB_PASS = "admin"
 DB_HOST = "localhost"
 DB_PORT = "5432"
 
+# Connection reuse. Without a pool each thread keeps its connection for
+# DB_CONN_MAX_AGE seconds (0 closes it after every request, None never does),
+# checked before reuse. DB_POOL=1 switches to Django's native pool instead,
+# which needs psycopg 3 with psycopg_pool; psycopg2 falls back to persistent
+# connections.
+DB_CONN_MAX_AGE = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+DB_POOL = os.getenv("DB_POOL", "0") == "1"
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+# Seconds a request waits for a free pooled connection before failing
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
+# Read replicas as comma-separated host[:port]; same name and credentials as
+# the primary. After a write a user's reads stay on the primary this long.
+DB_REPLICA_HOSTS = [host.strip() for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host.strip()]
+DB_REPLICA_PIN_SECONDS = int(os.getenv("DB_REPLICA_PIN_SECONDS", "5"))
+# Local stand-in: a second alias on the primary database itself
+DB_REPLICA_LOCAL = os.getenv("DB_REPLICA_LOCAL", "0") == "1"
+
 DJANGO_SUPERUSER_USERNAME = "admin"
 DJANGO_SUPERUSER_PASSWORD = "admin"
 DJANGO_SUPERUSER_EMAIL = "john.doe@example.com"
+
+# Chat model routing. Only models listed here may be requested by clients.
+# "deadline" is the hard per-call timeout in seconds, "fallback" is the model
+# used for hedged/failed calls and "cost" ranks models from cheapest upwards.
+DEFAULT_CHAT_MODEL = "gpt-4o-mini"
+CHAT_MODELS = {
+    "gpt-4o-mini": {"deadline": 30.0, "fallback": "gpt-4.1-mini", "cost": 1},
+    "gpt-4.1-mini": {"deadline": 30.0, "fallback": "gpt-4o-mini", "cost": 2},
+    "gpt-4o": {"deadline": 60.0, "fallback": "gpt-4o-mini", "cost": 10},
+    "gpt-4.1": {"deadline": 60.0, "fallback": "gpt-4o", "cost": 12},
+}
+# Prompts at most this long (with no news context) go to the cheapest model
+SIMPLE_PROMPT_MAX_CHARS = 200
+# Rolling window of calls kept per model for latency percentiles
+ROUTER_STATS_WINDOW = 200
+# Minimum samples before p95 is trusted for hedging
+ROUTER_MIN_SAMPLES = 20
+# Model call threads per process. A call holds up to two (primary and hedge),
+# so allow for twice the request threads plus CHAT_BATCH_MAX_CONCURRENCY (16);
+# calls queued behind a full pool wait within their deadline.
+ROUTER_MAX_WORKERS = int(os.getenv("ROUTER_MAX_WORKERS", "64"))
@@ -0,0 +1,94 @@
+"""
+Structured, queue-based logging.
+
+``QueuedHandler`` is what the LOGGING setting installs: the calling thread
+only stamps the record with the current request id and puts it on an
+in-memory queue. A ``QueueListener`` thread does the JSON formatting and the
+stream I/O, so request threads never block on stdout.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+request_id_var = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(logging.makeLogRecord({}).__dict__) | {"message", "asctime", "request_id"}
+
+
+class RequestIdFilter(logging.Filter):
+    """Copy the current request id onto the record while still in the request thread"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class DebugSampler(logging.Filter):
+    """Keep only a ``rate`` fraction of DEBUG records; other levels always pass"""
+
+    def __init__(self, rate=1.0):
+        super().__init__()
+        self.rate = float(rate)
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class QueuedHandler(QueueHandler):
+    """
+    QueueHandler that owns its listener and a JSON stream handler.
+
+    ``prepare`` merges the args into the message on the calling thread, as
+    QueueHandler does, because they may be mutated before the listener
+    formats the record. The JSON formatting itself, ``extra`` fields and the
+    traceback (rendered from ``exc_info``) are left to the listener.
+    """
+
+    def __init__(self, debug_sample_rate=1.0, stream=None):
+        super().__init__(queue.SimpleQueue())
+        self.addFilter(RequestIdFilter())
+        self.addFilter(DebugSampler(debug_sample_rate))
+        target = logging.StreamHandler(stream or sys.stdout)
+        target.setFormatter(JsonFormatter())
+        self.listener = QueueListener(self.queue, target, respect_handler_level=True)
+        self.listener.start()
+        atexit.register(self.listener.stop)
+
+    def prepare(self, record):
+        # A copy: other handlers of the same record still see msg and args
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def elapsed_ms(started):
+    """Milliseconds since ``started`` (a time.perf_counter() value), for log extras"""
+    return round((time.perf_counter() - started) * 1000, 1)
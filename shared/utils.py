@@ -4,6 +4,8 @@ from rest_framework.response import Response
 
 from logging import getLogger
 
+logger = getLogger(__name__)
+
 
 def handle_error(
     context: str | None = None,
@@ -17,16 +19,14 @@ def handle_error(
 
     if exc_value:
         error_msg = f"{base_msg}: {exc_value}"
-        # logger.exception(context or DEFAULT_MSG)
+        logger.exception(context or DEFAULT_MSG)
     else:
         error_msg = base_msg
-        # logger.error(context or DEFAULT_MSG)
+        logger.error(context or DEFAULT_MSG)
 
-    print(error_msg)
     return Response({"error": error_msg}, status=status)
 
 
 def handle_success(response: str) -> Response:
-    # logger.info(response)
-    print(response)
+    logger.info(response)
     return Response({"message": response})